@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import argparse
+import tracemalloc
+import pandas as pd
+
+import etl
+
+
+def measure(func, *args, **kwargs):
+    # Wall time and peak traced memory (Python objects and numpy buffers)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def report(rows, columns):
+    df = pd.DataFrame(rows, columns=columns)
+    print(df.to_string(index=False))
+    return df
+
+
+# The notebook's original loader: dict of lists, one append per column per
+# record, years as strings and the state names cleaned afterwards
+def legacy_load_table(table, data_path=etl.DATA_PATH):
+    spec = etl.TABLES[table]
+    path = os.path.join(data_path, spec['path'])
+
+    columns = {name: [] for name in ['States', 'years', 'Quarter'] + spec['columns']}
+    key_column = spec['columns'][0]
+    value_columns = spec['columns'][1:]
+    for state in os.listdir(path):
+        for year in etl.YEARS:
+            for file_name in etl.FILES_PER_YEAR:
+                file_path = os.path.join(path, state, year, file_name)
+                if os.path.exists(file_path):
+                    try:
+                        with open(file_path, "r") as data:
+                            json_data = json.load(data)
+                        for key, *values in spec['rows'](json_data):
+                            columns[key_column].append(key)
+                            for name, value in zip(value_columns, values):
+                                columns[name].append(value)
+                            columns['States'].append(state)
+                            columns['years'].append(year)
+                            columns['Quarter'].append(int(file_name.strip('.json')))
+                    except Exception:
+                        pass
+
+    df = pd.DataFrame(columns)
+    df['States'] = df['States'].str.replace("-", " ")
+    df['States'] = df['States'].str.title()
+    return df
+
+
+def bench_extract(data_path, tables):
+    rows = []
+    for table in tables:
+        legacy, legacy_time, legacy_peak = measure(legacy_load_table, table, data_path)
+        typed, typed_time, typed_peak = measure(etl.load_table, table, None, data_path)
+        rows.append((table, len(typed),
+                     len(legacy) / legacy_time, len(typed) / typed_time,
+                     legacy_peak / 2**20, typed_peak / 2**20,
+                     legacy.memory_usage(deep=True).sum() / 2**20,
+                     typed.memory_usage(deep=True).sum() / 2**20))
+    return report(rows, ['table', 'rows', 'legacy rows/s', 'typed rows/s',
+                         'legacy peak MiB', 'typed peak MiB', 'legacy frame MiB', 'typed frame MiB'])
+
+
+def bench_archive(data_path, archives, workers):
+    # Wall time of a full extraction from the extracted tree and from archives
+    rows = []
+    reference = None
+    for source in [data_path] + archives:
+        for n in sorted({1, workers}):
+            start = time.perf_counter()
+            dims, facts = etl.extract_all(source, workers=n)
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference = facts
+            same = all(facts[table].equals(reference[table]) for table in facts)
+            rows.append((source, n, elapsed, sum(len(df) for df in facts.values()), same))
+    return report(rows, ['source', 'workers', 'seconds', 'rows', 'same as tree'])
+
+
+def bench_snapshot(directory):
+    # Opening the current snapshot and touching every table should allocate
+    # (almost) nothing: the columns point into the memory-mapped files
+    import pyarrow as pa
+    import snapshot
+
+    start = time.perf_counter()
+    current = snapshot.current_snapshot(directory)
+    rows = []
+    for name in current.manifest['tables']:
+        table = current.table(name)
+        rows.append((name, table.num_rows, table.nbytes / 2**20))
+    elapsed = time.perf_counter() - start
+    print(f"version {current.version}: opened in {elapsed:.4f}s, "
+          f"arrow heap allocations {pa.total_allocated_bytes() / 2**20:.2f} MiB")
+    return report(rows, ['table', 'rows', 'mapped MiB'])
+
+
+def _cache_worker(directory, log_path, query_seconds):
+    from result_cache import ResultCache, DiskStore
+
+    def slow_query():
+        # Stands in for the MySQL query; every execution is logged
+        with open(log_path, 'a') as log:
+            log.write(f"{os.getpid()}\n")
+        time.sleep(query_seconds)
+        return pd.DataFrame({'States': ['Goa', 'Kerala'], 'total': [1.5, 2.5]})
+
+    cache = ResultCache(DiskStore(directory), lambda: 'v1')
+    start = time.perf_counter()
+    df = cache.get_or_compute(['get_transaction_analysis', 'Identifying Top States', []], slow_query)
+    return time.perf_counter() - start, len(df)
+
+
+def bench_cache(processes, query_seconds=0.5):
+    # N worker processes miss on the same key at once; with single-flight
+    # only one of them runs the query
+    import tempfile
+    import multiprocessing
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, 'queries.log')
+        cache_dir = os.path.join(directory, 'cache')
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.starmap(_cache_worker, [(cache_dir, log_path, query_seconds)] * processes)
+            # A second wave is served entirely from the shared store
+            results += pool.starmap(_cache_worker, [(cache_dir, log_path, query_seconds)] * processes)
+        with open(log_path) as log:
+            executions = len(log.readlines())
+    print(f"{2 * processes} requests from {processes} processes, {executions} query execution(s)")
+    return report([(wave, i, seconds) for i, (seconds, _) in enumerate(results)
+                   for wave in [1 if i < processes else 2]],
+                  ['wave', 'request', 'seconds'])
+
+
+def bench_geo(states=None):
+    # Render latency and figure payload per map view, with the geometry sent
+    # as a URL (what the dashboard does) and embedded in the figure
+    import numpy as np
+    import geo
+
+    # Pay plotly's import and template set-up before timing anything
+    geo.choropleth(pd.DataFrame({'States': [], 'value': []}), 'state', 'value')
+
+    views = [('state', None), ('district', None)]
+    views += [('district', state) for state in states or []]
+    rows = []
+    for level, state in views:
+        if not geo.geometry_available(level, state):
+            print(f"skipping {level} view of {state or 'India'}: run geo.py first")
+            continue
+        start = time.perf_counter()
+        features = geo.load_geometry(level, state)['features']
+        load_time = time.perf_counter() - start
+        if level == 'state':
+            df = pd.DataFrame({'States': [feature['properties']['name'] for feature in features]})
+        else:
+            df = pd.DataFrame({'States': [feature['properties']['state'] for feature in features],
+                               'district_name': [feature['properties']['name'] for feature in features]})
+        df['total_amount'] = np.random.default_rng(0).random(len(df))
+        for inline in (False, True):
+            start = time.perf_counter()
+            fig = geo.choropleth(df, level, 'total_amount', state=state, inline=inline)
+            payload = fig.to_json()
+            elapsed = time.perf_counter() - start
+            rows.append((level, state or 'India', len(df), 'inline' if inline else 'url',
+                         elapsed * 1000, len(payload) / 1024))
+        print(f"{level} view of {state or 'India'}: geometry parsed once in {load_time * 1000:.1f} ms")
+    return report(rows, ['level', 'area', 'features', 'geometry', 'render ms', 'payload KiB'])
+
+
+def bench_cube(data_path):
+    # Drill-down latency per level: a lookup in the precomputed cube (first
+    # and repeated), against aggregating the fact table for the same step
+    import cube
+
+    dims, facts = etl.extract_all(data_path)
+    tables = dict(dims.frames())
+    tables.update(facts)
+    cells, build_time, build_peak = measure(cube.build_cube, tables)
+    print(f"cube of {len(cells)} cells built in {build_time:.2f}s, peak {build_peak / 2**20:.1f} MiB")
+    lookup = cube.Cube(cells)
+
+    state_ids = sorted(tables['dim_state']['state_id'])
+    steps = {
+        'country': [('country', 0)],
+        'state': [('state', 0)],
+        'district': [('district', state_id) for state_id in state_ids],
+        'pincode': [('pincode', state_id) for state_id in state_ids],
+    }
+    # What the same step costs without the cube: filter and group the facts
+    sources = {'state': ('aggregated_transaction', 'state_id'), 'district': ('map_transaction', 'district_id'),
+               'pincode': ('top_transaction_pincode', 'pincode')}
+
+    def aggregate(level, parent):
+        table, member = sources['state' if level == 'country' else level]
+        df = facts[table]
+        if level in ('district', 'pincode'):
+            df = df[df['state_id'] == parent]
+        if level == 'country':
+            return df[['Transaction_count', 'Transaction_amount']].sum()
+        return df.groupby(member)[['Transaction_count', 'Transaction_amount']].sum()
+
+    rows = []
+    for level, keys in steps.items():
+        timings = {}
+        for name, run in [('cube first', lambda level, parent: lookup.slice('transactions', level, parent)),
+                          ('cube cached', lambda level, parent: lookup.slice('transactions', level, parent)),
+                          ('aggregate', aggregate)]:
+            start = time.perf_counter()
+            for key in keys:
+                run(*key)
+            timings[name] = (time.perf_counter() - start) / len(keys) * 1000
+        rows.append((level, len(keys), timings['cube first'], timings['cube cached'], timings['aggregate']))
+    return report(rows, ['level', 'steps', 'cube first ms', 'cube cached ms', 'aggregate ms'])
+
+
+def bench_forecast(data_path, series_counts):
+    # Fit time of the batched forecast against fitting one series at a time
+    # (same model, np.linalg.lstsq per series), on synthetic series; then a
+    # backtest on the real data: hold out the last HORIZON quarters and
+    # compare the error against a seasonal naive forecast (same quarter of
+    # the previous year)
+    import numpy as np
+    import forecast
+
+    def fit_each(values, periods):
+        values, periods = values[:, -forecast.WINDOW:], periods[-forecast.WINDOW:]
+        x = forecast.design_matrix(np.concatenate([periods, periods[-1] + 1 + np.arange(forecast.HORIZON)]))
+        x_fit, x_future = x[:len(periods)], x[len(periods):]
+        results = np.full((len(values), forecast.HORIZON), np.nan)
+        for row, series in enumerate(values):
+            observed = np.isfinite(series)
+            if observed.sum() >= forecast.MIN_OBSERVATIONS:
+                coefficients = np.linalg.lstsq(x_fit[observed], np.log1p(series[observed]), rcond=None)[0]
+                results[row] = np.expm1(x_future @ coefficients)
+        return results
+
+    rng = np.random.default_rng(0)
+    periods = np.arange(2018 * 4, 2025 * 4)
+    rows = []
+    for count in series_counts:
+        t = np.arange(len(periods))
+        level = rng.lognormal(12, 2, (count, 1))
+        values = level * np.exp(0.05 * t + 0.1 * np.sin(np.pi / 2 * t) + rng.normal(0, 0.1, (count, len(t))))
+        values[rng.random(values.shape) < 0.05] = np.nan
+        start = time.perf_counter()
+        forecast.fit(values, periods)
+        batched = time.perf_counter() - start
+        start = time.perf_counter()
+        fit_each(values, periods)
+        looped = time.perf_counter() - start
+        rows.append((count, batched * 1000, looped * 1000, looped / batched))
+    report(rows, ['series', 'batched ms', 'per-series ms', 'speedup'])
+
+    dims, facts = etl.extract_all(data_path)
+    tables = dict(dims.frames())
+    tables.update(facts)
+    rows = []
+    for measure_name, (table, column) in forecast.FORECAST_MEASURES.items():
+        for level, keys in [('state', ['state_id']), ('district', ['state_id', 'district_id'])]:
+            _, values, periods = forecast.series_matrix(tables[table], keys, column)
+            history, actual = values[:, :-forecast.HORIZON], values[:, -forecast.HORIZON:]
+            predicted = forecast.fit(history, periods[:-forecast.HORIZON])[0]
+            naive = history[:, -4:][:, :forecast.HORIZON]
+            errors = {}
+            for name, guess in [('model', predicted), ('seasonal naive', naive)]:
+                valid = np.isfinite(guess) & np.isfinite(actual) & (actual > 0)
+                errors[name] = np.median(np.abs(guess[valid] - actual[valid]) / actual[valid]) * 100
+            rows.append((measure_name, level, len(values), errors['model'], errors['seasonal naive']))
+    return report(rows, ['measure', 'level', 'series', 'model MdAPE %', 'seasonal naive MdAPE %'])
+
+
+def bench_progressive():
+    # Time to first chart (stored preview, drawn headless) against time to
+    # the exact chart (the view's SQL, then the same drawing) for every
+    # previewed view. Needs the MySQL database loaded by etl.py.
+    import matplotlib.pyplot as plt
+    import charts
+    import preview
+    from queries import QUERY_FUNCTIONS
+
+    def first_chart(function, query_type, params):
+        sample = preview.load(function, query_type, params.get('year'))
+        return None if sample is None else (sample, charts.draw(function, query_type, sample['df'], **params))
+
+    def exact_chart(function, query_type, params):
+        df = QUERY_FUNCTIONS[function].run_sql(query_type, **params)
+        return df, charts.draw(function, query_type, df, **params)
+
+    rows = []
+    for (function, query_type), (year_table, _) in preview.PREVIEW_VIEWS.items():
+        params = {'year': None} if year_table else {}
+        start = time.perf_counter()
+        result = first_chart(function, query_type, params)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        df, _ = exact_chart(function, query_type, params)
+        exact = time.perf_counter() - start
+        plt.close('all')
+        sample_rows = result[0]['rows'] if result else None
+        rows.append((f"{function} / {query_type}", sample_rows, len(df),
+                     first * 1000 if result else None, exact * 1000))
+    return report(rows, ['view', 'preview rows', 'exact rows', 'first chart ms', 'exact chart ms'])
+
+
+def _rss():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def measure_rss(func, *args, **kwargs):
+    # Wall time and peak resident memory above the starting point, sampled
+    # every 5 ms. Unlike tracemalloc this sees Arrow's allocations and
+    # doesn't slow down allocation-heavy code such as to_csv. Linux only.
+    import threading
+
+    start_rss = _rss()
+    peak = [start_rss]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], _rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return result, elapsed, max(peak[0], _rss()) - start_rss
+
+
+def _stream_case(base, total_rows, chunk_rows, data_format, streamed, path):
+    # Runs in a fresh process so earlier cases don't leave memory behind
+    import download
+
+    def chunks():
+        # Stands in for fetchmany() on a server-side cursor: a new frame per chunk
+        block = base.sample(chunk_rows, replace=True, random_state=0, ignore_index=True)
+        for start in range(0, total_rows, chunk_rows):
+            yield block.head(min(chunk_rows, total_rows - start)).copy()
+
+    def write():
+        if streamed:
+            return download.WRITERS[data_format](chunks(), path)
+        # What pd.read_sql + to_csv / to_parquet does: the whole result first
+        df = pd.concat(chunks(), ignore_index=True)
+        return download.WRITERS[data_format]([df], path)
+
+    (rows, paths), elapsed, peak = measure_rss(write)
+    return rows, elapsed, peak / 2**20, sum(os.path.getsize(part) for part in paths) / 2**20
+
+
+def _stream_view_case(function, query_type, chunk_rows, data_format, streamed, path):
+    # The real path of a download: stream_view (read_sql_chunks on MySQL)
+    # against pd.read_sql of the whole result
+    import download
+    from queries import stream_view, QUERY_FUNCTIONS
+
+    def write():
+        if streamed:
+            return download.WRITERS[data_format](stream_view(function, query_type, chunk_rows), path)
+        return download.WRITERS[data_format]([QUERY_FUNCTIONS[function].run_sql(query_type)], path)
+
+    (rows, paths), elapsed, peak = measure_rss(write)
+    return rows, elapsed, peak / 2**20, sum(os.path.getsize(part) for part in paths) / 2**20
+
+
+def bench_stream(data_path, scale=100, view=None):
+    # Writing a view result scale times the size of map_user, streamed in
+    # chunks vs built in pandas first. With view ('function:query_type')
+    # the same for that view read from MySQL.
+    import tempfile
+    import multiprocessing
+    import download
+
+    if view:
+        function, query_type = view.split(':', 1)
+        cases = [(_stream_view_case, (function, query_type))]
+    else:
+        base = etl.load_table('map_user', None, data_path)
+        cases = [(_stream_case, (base, len(base) * scale))]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        with multiprocessing.get_context('spawn').Pool(1, maxtasksperchild=1) as pool:
+            for case, arguments in cases:
+                for data_format in download.FORMATS:
+                    for streamed in (False, True):
+                        path = os.path.join(directory, f"export{download.FORMATS[data_format]}")
+                        written, elapsed, peak, size = pool.apply(
+                            case, arguments + (download.CHUNK_ROWS, data_format, streamed, path))
+                        rows.append((data_format, 'streamed' if streamed else 'materialised', written,
+                                     written / elapsed, peak, size))
+    return report(rows, ['format', 'mode', 'rows', 'rows/s', 'peak MiB', 'file MiB'])
+
+
+BENCHMARKS = {
+    'extract': lambda args: bench_extract(
+        args.data_path, args.tables or ['map_user', 'top_transaction_pincode',
+                                        'top_user_pincode', 'top_insurance_pincode']),
+    'archive': lambda args: bench_archive(args.data_path, args.archives or [], args.workers),
+    'snapshot': lambda args: bench_snapshot(args.snapshot),
+    'cache': lambda args: bench_cache(args.workers),
+    'geo': lambda args: bench_geo(args.states),
+    'cube': lambda args: bench_cube(args.data_path),
+    'stream': lambda args: bench_stream(args.data_path, args.scale, args.view),
+    'forecast': lambda args: bench_forecast(args.data_path, args.series or [1000, 5000, 20000]),
+    'progressive': lambda args: bench_progressive(),
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='PhonePe ETL and dashboard benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--data-path', default=etl.DATA_PATH,
+                        help='path to the pulse/data folder of the Pulse repository')
+    parser.add_argument('--tables', nargs='*', help='tables to benchmark')
+    parser.add_argument('--archives', nargs='*', help='zip/tar archives of the Pulse repository')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='reader threads to compare against 1, or worker processes for the cache benchmark')
+    parser.add_argument('--snapshot', help='snapshot directory published by etl.py --snapshot')
+    parser.add_argument('--scale', type=int, default=100, help='result size multiplier for the stream benchmark')
+    parser.add_argument('--series', nargs='*', type=int,
+                        help='synthetic series counts for the forecast benchmark')
+    parser.add_argument('--view', metavar='FUNCTION:QUERY_TYPE',
+                        help='stream this view from MySQL in the stream benchmark, e.g. '
+                             '"get_user_growth_analysis:Trend Analysis Over Time"')
+    parser.add_argument('--states', nargs='*', help='states whose zoomed-in district maps to benchmark')
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
@@ -0,0 +1,560 @@
+import functools
+import matplotlib.pyplot as plt
+import pandas as pd
+import plotly.express as px
+import seaborn as sns
+
+import geo
+from queries import MAP_MEASURES, QUERY_TYPES
+
+# Figures for every dashboard view. Each chart function takes the view's
+# query result and returns its figures (matplotlib or Plotly) in the order the
+# dashboard lays them out; nothing here depends on Streamlit, so export.py
+# renders the same figures headless.
+
+
+# Decoding Transaction Dynamics on PhonePe
+
+def regional_performance_analysis(df):
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(
+        x='years',
+        y='total_transaction_amount',
+        data=df,
+        palette='coolwarm',
+        hue= 'States',
+        width=1.5
+    )
+    plt.title('Regional Performance Analysis')
+    plt.xlabel('years')
+    plt.ylabel('Transaction Amount')
+    plt.xticks(rotation=45)
+    return [fig]
+
+def category_insights(df):
+    fig1 = plt.figure(figsize=(10, 6))
+    sns.barplot(
+        x='Transaction_type',
+        y='total_revenue',
+        data=df,
+        color='lightcoral',
+        label='Transaction Volume'
+    )
+    plt.title('Distribution of Total Transaction Amount')
+    plt.xlabel('Transaction Category')
+    plt.ylabel('Amount')
+    plt.xticks(rotation=45)
+
+    # Second Visualization: Pie Chart for Transaction Categories
+    transaction_data = df.groupby('Transaction_type')['total_volume'].sum()
+    fig2 = plt.figure(figsize=(8, 8))
+    plt.pie(
+        transaction_data,
+        labels=transaction_data.index,
+        autopct='%.2f%%',
+        colors=sns.color_palette("RdBu", len(transaction_data)),
+        startangle=90
+    )
+    plt.title("Distribution of Total Transaction Count")
+    return [fig1, fig2]
+
+def trend_analysis(df, year=None):
+    fig = plt.figure(figsize=(10,6))
+    sns.barplot(data=df, x='Quarter', y='total_revenue', hue='Transaction_type', palette='Set1')
+    plt.title(f'Transaction Amount Distribution -{year}',fontsize=14)
+    plt.xlabel('Quarter',fontsize=12)
+    plt.ylabel('Revenue',fontsize=12)
+    plt.xticks(rotation=45)
+    return [fig]
+
+def investigate_interdependencies(df):
+    fig = plt.figure(figsize=(12, 6))
+
+    # Plot: Growth Percentage Over Years (for each state)
+    sns.lineplot(data=df, x='years', y='Growth_percentage')
+
+    # Title and labels
+    plt.title('Transaction Amount Growth Percentage Over Years')
+    plt.xlabel('Year')
+    plt.ylabel('Growth Percentage (%)')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.grid()
+    return [fig]
+
+
+# Transaction Analysis Across States and Districts
+
+def top_states(df):
+    fig = plt.figure(figsize=(5, 3))
+    sns.barplot(x='States', y='Total_Transaction_Value', data=df, palette='viridis')
+    plt.title(f"Top 10 States by Total Transactions")
+    plt.xlabel('States')
+    plt.ylabel('Total Transactions Amount')
+    plt.xticks(rotation=60, ha='right')
+    return [fig]
+
+def district_transaction_performance(df):
+    # First barplot for Transaction Count
+    fig1 = plt.figure()
+    sns.barplot(x='Total_Transactions', y='district_name', data=df, palette='Blues_d')
+    plt.title('Top 10 Districts by Total Transaction Count')
+    plt.tight_layout()
+
+    # Second barplot for Transaction Value
+    fig2 = plt.figure()
+    sns.barplot(x='Total_Transaction_Value', y='district_name', data=df, palette='Oranges_d')
+    plt.title('Top 10 Districts by Total Transaction Value')
+    plt.tight_layout()
+    return [fig1, fig2]
+
+def pincode_transactions(df):
+    fig1 = plt.figure(figsize=(5,7))
+    sns.barplot(x ='pincode', y = 'Total_Transactions', palette='Set2', hue='States', data= df)
+    plt.xlabel('Pincode')
+    plt.ylabel('Total Transactions')
+    plt.title('Top 10 pincodes most Transactions')
+    plt.xticks(rotation = 60, ha='right')
+    plt.tight_layout()
+
+    fig2 = plt.figure(figsize=(5,7))
+    sns.barplot(x ='pincode', y ='Total_Transaction_Value', hue='States', palette='tab10', data=df)
+    plt.xlabel('Pincode')
+    plt.ylabel('Total Transactions amount')
+    plt.title('Top 10 pincodes most Transactions amount')
+    plt.xticks(rotation = 60, ha='right')
+    plt.tight_layout()
+    return [fig1, fig2]
+
+def district_comparison(df):
+    fig1 = px.bar(df,
+        x='district_name',
+        y='Total_Transaction_Value',
+        color='Percentage_Share',
+        facet_col='years',
+        title="Top 50 Districts by Transaction Value and percentage share",
+        labels={'district_name': 'District', 'Total_Transaction_Value': 'Transaction Value'},
+        color_continuous_scale='Viridis')
+    fig1.update_layout(xaxis_title='District',
+                       yaxis_title='Transaction Value',
+                       xaxis_tickangle=-45)
+
+    fig2 = plt.figure(figsize=(14, 6))
+    sns.scatterplot(x='Total_Transactions', y='Total_Transaction_Value', hue='district_name', data=df)
+    plt.title('Comparing Transaction Value vs. Count Across Regions')
+    plt.xlabel('Transaction Count')
+    plt.ylabel('Transaction Value')
+    plt.xticks(rotation=45)
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    plt.tight_layout()
+    return [fig1, fig2]
+
+
+# Transaction Analysis for Market Expansion
+
+def volume_and_value(df):
+    fig = px.bar(df,
+                x='States',
+                y='total_value_transaction',
+                color='States',
+                title="Comparison of Transaction Value by State",
+                labels={'States': 'State', 'total_value_transaction': 'Total Value Transactions'},
+                color_continuous_scale='magma')
+    fig.update_layout(
+        xaxis_title='States',
+        yaxis_title='Total Value Transactions',
+        xaxis_tickangle=-60
+    )
+    return [fig]
+
+def state_performance_comparison(df):
+    fig1 = px.pie(df,
+        names='States',
+        values='total_transaction_value',
+        title='Proportion of Transaction Value by State',
+        color='States',  # Optional: Add color differentiation for each state
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        hole=0.4)
+
+    fig2 = px.bar(df,
+        x='States',
+        y='total_transaction_value',
+        color='performance_category',
+        title='State-wise Transaction Value by Performance Category',
+        labels={'States': 'State', 'total_transaction_value': 'Total Transaction Value','performance_category':'Performance Category'},
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        barmode='stack')
+    fig2.update_layout(
+        xaxis_title='States',
+        yaxis_title='Total Transaction Value',
+        xaxis_tickangle=90,
+        title_font_size=16
+    )
+    return [fig1, fig2]
+
+def district_level_insights(df):
+    fig = px.bar(df,
+        x='district_name',
+        y= 'total_revenue',
+        title='Transaction Growth and Success by top 50 District-level',
+        labels={'district_name': 'District', 'total_count': 'Total Transaction Count', 'total_revenue': 'Total Transaction Revenue'},
+        color='district_name',
+        color_discrete_sequence=px.colors.sequential.Magma)
+    fig.update_layout(
+        title_font_size=16,
+        xaxis_title='Districts',
+        yaxis_title='Total Revenue',
+        xaxis_tickangle=60,
+    )
+    return [fig]
+
+def trends_over_time(df):
+    # Bar plot to compare seasonal patterns
+    fig1 = px.bar(df,
+            x = 'Quarter',
+            y = 'total_revenue',
+            title ='Seasonal Revenue Patterns',
+            labels={'total_revenue': 'Total Revenue'},
+            color_discrete_sequence=px.colors.sequential.Magma)
+    fig1.update_layout(
+        title_font_size=16,
+        xaxis_title='Quarter',
+        yaxis_title='Total Revenue',
+        legend_title='States')
+
+    fig2 = px.bar(df,
+        x='years',
+        y='total_revenue',
+        color='States',
+        title='Year-wise Revenue Trends by States',
+        labels={'years': 'Year', 'total_revenue': 'Total Revenue'},
+        color_discrete_sequence=px.colors.sequential.Electric)
+    fig2.update_layout(
+        title_font_size=16,
+        xaxis_title='Year',
+        yaxis_title='Total Revenue',
+        legend_title='States')
+    return [fig1, fig2]
+
+def market_potential(df):
+    # Scatter plot: Transaction count vs. average transaction value
+    fig = plt.figure(figsize=(10,6))
+    sns.scatterplot(data=df, x='total_transactions', y='avg_transaction_value', hue="States", size="total_revenue", sizes=(50, 500))
+    plt.xlabel('Total Transactions')
+    plt.ylabel('Average Transaction Value ($)')
+    plt.title('States with High Transactions but Low Average Transaction Values')
+    plt.legend(loc='upper left', bbox_to_anchor=(1, 1), title='Total revenue', ncol=2)
+    return [fig]
+
+
+# User Engagement and Growth Strategy
+
+def user_engagement(df):
+    fig1 = plt.figure(figsize=(10,6))
+    sns.barplot(x='States', y='total_registered_users', data=df, palette='viridis')
+    plt.title('Total Registered Users by State and District')
+    plt.xlabel('States')
+    plt.ylabel('Total Registered Users')
+    plt.xticks(rotation=60, ha ='right')
+
+    fig2 = plt.figure()
+    sns.barplot(x='States', y='avg_appopens', data=df, palette='coolwarm')
+    plt.title('Average App Opens per User by State', fontsize=16)
+    plt.xlabel('States', fontsize=12)
+    plt.ylabel('Average App Opens per User', fontsize=12)
+    plt.xticks(rotation=60, ha ='right')
+    return [fig1, fig2]
+
+def user_performance_comparison(df):
+    fig = px.scatter(
+        df,
+        x='total_registered_user',
+        y='total_appopens',
+        color_continuous_scale=px.colors.sequential.Plasma,
+        title='Registered Users vs App Opens',
+        labels={'total_registered_user': 'Total Registered Users', 'total_appopens': 'Total App Opens'}
+    )
+    fig.update_layout(
+        title_font_size=20,
+        xaxis_title="Total Registered Users",
+        yaxis_title="Total App Opens"
+    )
+    return [fig]
+
+def user_trends_over_time(df, year=None):
+    fig1 = plt.figure(figsize=(12, 6))
+    sns.lineplot(x='Quarter', y='total_user', data= df, marker='o', label='Registered Users')
+    sns.lineplot(x='Quarter', y='total_appopens', data=df, marker='o', label='App Opens')
+    plt.title('User Registration and App Open Trends Over Quarters')
+    plt.xlabel('Quarter')
+    plt.ylabel("Total Users and Total App Opens")
+    plt.xticks(rotation=45)
+    plt.legend()
+    plt.grid()
+
+    fig2 = px.bar(
+        df,
+        x='Quarter',
+        y='total_appopens',
+        color='States',
+        title='Growth Trends in App Opens by State',
+        labels={'total_appopens': 'Total App Opens'},
+        color_discrete_sequence=px.colors.sequential.RdBu
+    )
+    # Customize layout for better appearance
+    fig2.update_layout(
+        title_font_size=16,
+        xaxis_title="Quarter",
+        yaxis_title="Total App Opens"
+    )
+    return [fig1, fig2]
+
+def high_value_markets(df):
+    fig = plt.figure(figsize=(14,6))
+    # Create the bar plot for total registered users
+    sns.barplot(
+            x='States',
+            y='total_registered_user',
+            data=df,
+            palette='viridis',
+    )
+
+    # Add app open ratio as a line plot
+    sns.lineplot(
+            x='States',
+            y='app_open_ratio',
+            data=df,
+            marker='o',
+            color='red',
+            label='App Open Ratio'
+    )
+    plt.title('Total Registered Users and App Open Ratios by States')
+    plt.xlabel('States')
+    plt.ylabel('Total Registered Users')
+    plt.xticks(rotation=45, ha='right')
+
+    # Adding a second y-axis for app open ratio (same plot, different scale)
+    plt.twinx()
+    plt.ylabel('App Open Ratio', color='red')
+    plt.tick_params(axis='y', labelcolor='red')
+    return [fig]
+
+
+# User Registration Analysis
+
+def top_registration_states(df):
+    fig = px.bar(df,
+     x="States",
+     y="highest_registered_users",
+     color="years",
+     title="Top 10 Highest Registered Users by States, Year, and Quarter",
+     labels={"highest_registered_users": "Registered Users", "States": "State"},
+     barmode="group")
+    fig.update_layout(
+         title_font_size=20,
+         xaxis_title="States",
+         yaxis_title="Total Registered Users"
+    )
+    return [fig]
+
+def registration_fluctuations(df):
+    fig1 = px.bar(
+            df,
+            x="Quarter",
+            y="total_registered_users",
+            color="States",
+            title="Total Registered Users by Quarter and State with Changes",
+            labels={"total_registered_users": "Total Registered Users", "Quarter": "Quarter"},
+            color_discrete_sequence=px.colors.qualitative.Set2,
+            barmode="group"
+        )
+    # Add the change_from_previous_quarter as a separate chart
+    fig2 = px.bar(
+            df,
+            x="Quarter",
+            y="change_from_previous_quarter",
+            color="States",
+            barmode= 'group',
+            title="Change in Registered Users Across Previous Quarters and States",
+            labels={"change_from_previous_quarter": "Change from Previous Quarter"},
+            color_discrete_sequence=px.colors.qualitative.Set2,
+        )
+    return [fig1, fig2]
+
+def district_registrations(df):
+    fig = px.bar(df,
+                    x="district_name",
+                    y="registered_users",
+                    color="States",
+                    title="Top 10 Registered Users by Districts",
+                    labels={"registered_users": "Total registered Users", "district_name": "District"})
+    fig.update_layout(
+        xaxis_title = 'Districts',
+        yaxis_title = 'Total registered Users'
+    )
+    return [fig]
+
+def pincode_registrations(df):
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(x='pincode', y='user_registrations', hue ='States', data=df, palette='Set2')
+
+    plt.title('Top 10 Pin Codes with Highest User Registrations', fontsize=16)
+    plt.xlabel('Pincode', fontsize=12)
+    plt.ylabel('User Registrations', fontsize=12)
+    plt.legend(ncol=2)
+    plt.xticks(rotation=45)
+    return [fig]
+
+def registration_comparison(df):
+    # Interactive bar plot using Plotly
+    fig = px.bar(
+                df,
+                x='States',
+                y='total_registered_users',
+                color='district_name',
+                title='Districts with the Highest Registered Users in Each State',
+                labels={'total_registered_users': 'Total Registered Users', 'district_name': 'District Name','States':'State'},
+                color_discrete_sequence=px.colors.qualitative.Set2
+            )
+    fig.update_layout(
+        xaxis_title='States',
+        yaxis_title='Total Registered Users',
+        barmode='stack',
+        xaxis_tickangle=-60,
+        bargroupgap=0.04,
+        bargap=0.1,
+        width=2500
+    )
+    return [fig]
+
+
+# India Map View
+
+def map_view(df, query_type, year=None, state=None, value=None, inline=False):
+    # df holds one row per area and year; the map shows the selected year or
+    # the sum over all years. inline embeds the geometry (standalone HTML).
+    metric, level = query_type.rsplit(' by ', 1)
+    value = value or list(MAP_MEASURES[metric][1])[0]
+    keys = ['States'] if level == 'State' else ['States', 'district_name']
+    df = df.drop(columns='years').groupby(keys, as_index=False).sum()
+
+    fig = geo.choropleth(
+        df, level.lower(), value, state=state, inline=inline,
+        title=f"{metric} by {level} - {state or 'All India'}, {year or 'All Years'}",
+        labels={value: value.replace('_', ' ').title()},
+        color_continuous_scale='Viridis')
+    return [fig]
+
+
+# Drill-Down Explorer
+
+def drill_down(df, measure, title, top=30):
+    # One level of the cube under its parent, largest members first
+    fig = px.bar(df.head(top),
+        x='name',
+        y=measure,
+        color=measure,
+        title=title,
+        labels={'name': '', measure: measure.replace('_', ' ').title()},
+        color_continuous_scale='Viridis')
+    fig.update_layout(xaxis_tickangle=-45)
+    return [fig]
+
+
+# Forecasts
+
+def forecast_view(df, title, state=None, top=10):
+    # Quarterly actuals (solid) and the stored forecasts (dashed, with a 95%
+    # band) of the largest series; districts when the view has them. District
+    # names repeat across states (Aurangabad, Bilaspur...), so a district
+    # series is labelled with its state.
+    label = 'series'
+    if 'district_name' in df:
+        series = df['district_name'].astype(str) + ' (' + df['States'].astype(str) + ')'
+        level = 'District'
+    else:
+        series = df['States']
+        level = 'State'
+    df = df.assign(series=series, period=df['years'].astype(str) + ' Q' + df['Quarter'].astype(str))
+    actual = df[df['kind'] == 'actual']
+    latest = actual.sort_values(['years', 'Quarter']).groupby(label)['value'].last()
+    largest = latest.nlargest(top).index
+    df = df[df[label].isin(largest)]
+
+    # Start each dashed line at the last actual quarter so the two connect
+    last = df[df['kind'] == 'actual'].sort_values(['years', 'Quarter']).groupby(label).tail(1)
+    df = pd.concat([df, last.assign(kind='forecast', lower=last['value'], upper=last['value'])])
+    df = df.sort_values(['years', 'Quarter'], kind='stable')
+    df = df.assign(above=df['upper'] - df['value'], below=df['value'] - df['lower'])
+
+    fig = px.line(df,
+        x='period',
+        y='value',
+        color=label,
+        line_dash='kind',
+        error_y='above',
+        error_y_minus='below',
+        title=f"{title} - {state or 'All India'}: next quarters (top {len(largest)})",
+        # Distinct legend titles: Plotly merges trace names when they're equal
+        labels={'period': 'Quarter', 'value': title.rsplit(' by ', 1)[0], label: level, 'kind': 'Values'},
+        category_orders={label: list(largest)})
+    fig.update_traces(error_y_thickness=1)
+    return [fig]
+
+
+# Dropdown section -> query function, and the sections in dropdown order
+SECTIONS = {
+    "Decoding Transaction Dynamics on PhonePe": 'get_decoding_transaction_dynamics',
+    "Transaction Analysis Across States and Districts": 'get_transaction_analysis',
+    "Transaction Analysis for Market Expansion": 'get_transaction_market_analysis',
+    "User Engagement and Growth Strategy": 'get_user_growth_analysis',
+    "User Registration Analysis": 'get_user_registration_analysis',
+    "India Map View": 'get_map_analysis',
+    "Forecasts": 'get_forecast_analysis',
+}
+
+# (query function, query_type) -> (chart function, dashboard columns). The
+# columns are passed to st.columns; None stacks the figures full width.
+CHARTS = {
+    ('get_decoding_transaction_dynamics', 'Regional Performance Analysis'): (regional_performance_analysis, 2),
+    ('get_decoding_transaction_dynamics', 'Category Insights'): (category_insights, 2),
+    ('get_decoding_transaction_dynamics', 'Trend Analysis'): (trend_analysis, 2),
+    ('get_decoding_transaction_dynamics', 'Investigate Interdependencies'): (investigate_interdependencies, 2),
+    ('get_transaction_analysis', 'Identifying Top States'): (top_states, 2),
+    ('get_transaction_analysis', 'District Performance Evaluation'): (district_transaction_performance, 2),
+    ('get_transaction_analysis', 'Pin Code Insights'): (pincode_transactions, 2),
+    ('get_transaction_analysis', 'Comparative Analysis'): (district_comparison, 2),
+    ('get_transaction_market_analysis', 'Transaction Volume and Value Analysis'): (volume_and_value, None),
+    ('get_transaction_market_analysis', 'Performance Comparison'): (state_performance_comparison, 2),
+    ('get_transaction_market_analysis', 'District-Level Insights'): (district_level_insights, None),
+    ('get_transaction_market_analysis', 'Trends Over Time'): (trends_over_time, [2, 3]),
+    ('get_transaction_market_analysis', 'Market Potential and Strategy Development'): (market_potential, None),
+    ('get_user_growth_analysis', 'User Engagement Analysis'): (user_engagement, 2),
+    ('get_user_growth_analysis', 'Performance Comparison'): (user_performance_comparison, 2),
+    ('get_user_growth_analysis', 'Trend Analysis Over Time'): (user_trends_over_time, [2, 3]),
+    ('get_user_growth_analysis', 'Identifying High-Value Markets'): (high_value_markets, 2),
+    ('get_user_registration_analysis', 'Identifying Top 10 States'): (top_registration_states, 2),
+    ('get_user_registration_analysis',
+     'Analyze fluctuations in user registration across different quarters and states'): (registration_fluctuations, None),
+    ('get_user_registration_analysis', 'District Performance Evaluation'): (district_registrations, None),
+    ('get_user_registration_analysis', 'Pin Code Insights'): (pincode_registrations, None),
+    ('get_user_registration_analysis', 'Comparative Analysis'): (registration_comparison, None),
+}
+CHARTS.update({('get_forecast_analysis', query_type): (functools.partial(forecast_view, title=query_type), None)
+               for query_type in QUERY_TYPES['get_forecast_analysis']})
+
+# Views that take a year: (query function, query_type) -> (fact table the
+# years come from, whether "All Years" is allowed)
+YEAR_VIEWS = {
+    ('get_decoding_transaction_dynamics', 'Trend Analysis'): ('aggregated_transaction', False),
+    ('get_user_growth_analysis', 'Trend Analysis Over Time'): ('map_user', True),
+}
+
+# Views that can be narrowed to one state (None shows all of India)
+STATE_VIEWS = {('get_forecast_analysis', query_type) for query_type in QUERY_TYPES['get_forecast_analysis']
+               if query_type.endswith(' by District')}
+
+
+def draw(function, query_type, df, **params):
+    chart, _ = CHARTS[(function, query_type)]
+    return chart(df, **params)
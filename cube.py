@@ -0,0 +1,186 @@
+import pandas as pd
+
+# Drill-down cube over (domain, geo level, year, quarter, category), built by
+# the ETL from the fact tables and stored next to them (MySQL table olap_cube,
+# snapshot table olap_cube). A cell is one member of a level under a parent:
+#   country   parent 0         member 0
+#   state     parent 0         member state_id
+#   district  parent state_id  member district_id
+#   pincode   parent state_id  member pincode
+# Pulse only publishes the top pincodes of each state, so pincodes drill down
+# from a state, not from a district. years = 0 / Quarter = 0 are the
+# all-years / all-quarters roll-ups and category 'All' is the total.
+LEVELS = ['country', 'state', 'district', 'pincode']
+ALL = 'All'
+
+DOMAIN_MEASURES = {
+    'transactions': ['count', 'amount'],
+    'users': ['registered_users', 'app_opens'],
+    'insurance': ['count', 'amount'],
+}
+
+# How a measure rolls up over time. Registered users is a running total, so
+# a year (or all years) shows its last quarter instead of the sum.
+TIME_AGGREGATION = {'count': 'sum', 'amount': 'sum', 'registered_users': 'last', 'app_opens': 'sum'}
+
+# Domain -> level -> sources: (fact table, member column, {measure: fact column},
+# category column or None). Categories (transaction type, device brand,
+# insurance name) only exist in the aggregated_* tables, i.e. at state level.
+SOURCES = {
+    'transactions': {
+        'state': [('aggregated_transaction', 'state_id',
+                   {'count': 'Transaction_count', 'amount': 'Transaction_amount'}, 'Transaction_type')],
+        'district': [('map_transaction', 'district_id',
+                      {'count': 'Transaction_count', 'amount': 'Transaction_amount'}, None)],
+        'pincode': [('top_transaction_pincode', 'pincode',
+                     {'count': 'Transaction_count', 'amount': 'Transaction_amount'}, None)],
+    },
+    'users': {
+        # Brands cover devices Pulse could identify; totals and app opens
+        # come from the district figures
+        'state': [('aggregated_user', 'state_id', {'registered_users': 'User_count'}, 'User_brand'),
+                  ('map_user', 'state_id', {'registered_users': 'registered_user', 'app_opens': 'appOpens'}, None)],
+        'district': [('map_user', 'district_id',
+                      {'registered_users': 'registered_user', 'app_opens': 'appOpens'}, None)],
+        'pincode': [('top_user_pincode', 'pincode', {'registered_users': 'registeredUsers'}, None)],
+    },
+    'insurance': {
+        'state': [('aggregated_insurance', 'state_id', {'count': 'count', 'amount': 'amount'}, 'Name')],
+        'district': [('map_insurance', 'district_id', {'count': 'Count', 'amount': 'amount'}, None)],
+        'pincode': [('top_insurance_pincode', 'pincode', {'count': 'count', 'amount': 'amount'}, None)],
+    },
+}
+
+MEASURES = ['count', 'amount', 'registered_users', 'app_opens']
+COLUMNS = ['domain', 'level', 'parent', 'member', 'years', 'Quarter', 'category', 'name'] + MEASURES
+KEY = ['domain', 'level', 'parent', 'years', 'Quarter', 'category']
+
+CUBE_DDL = """CREATE TABLE olap_cube(domain VARCHAR(16) NOT NULL,
+                                     level VARCHAR(16) NOT NULL,
+                                     parent INT NOT NULL,
+                                     member INT NOT NULL,
+                                     years SMALLINT NOT NULL,
+                                     Quarter TINYINT NOT NULL,
+                                     category VARCHAR(250) NOT NULL,
+                                     name VARCHAR(250) NOT NULL,
+                                     count DOUBLE, amount DOUBLE,
+                                     registered_users DOUBLE, app_opens DOUBLE,
+                                     PRIMARY KEY (domain, level, parent, years, Quarter, category, member))"""
+
+
+def _level_cells(tables, level, sources):
+    frames = []
+    for table, member, measures, category in sources:
+        # Pulse leaves some top-list entries without a pincode (NULL in
+        # MySQL, NA after extraction); they can't be drilled into
+        df = tables[table].dropna(subset=[member])
+        cells = pd.DataFrame({
+            'parent': 0 if level == 'state' else df['state_id'].astype('int64'),
+            'member': df[member].astype('int64'),
+            'years': df['years'].astype('int64'),
+            'Quarter': df['Quarter'].astype('int64'),
+            'category': df[category].astype(str) if category else ALL,
+        })
+        for measure, column in measures.items():
+            cells[measure] = df[column].astype('float64')
+        frames.append(cells)
+    cells = pd.concat(frames, ignore_index=True)
+    keys = ['parent', 'member', 'years', 'Quarter', 'category']
+    cells = cells.groupby(keys, as_index=False, sort=False).sum(min_count=1)
+    if all(category for *_, category in sources):
+        # No source with totals: 'All' is the sum over categories
+        totals = cells.groupby(keys[:-1], as_index=False, sort=False).sum(numeric_only=True, min_count=1)
+        cells = pd.concat([cells, totals.assign(category=ALL)], ignore_index=True)
+    return cells
+
+
+def _aggregate(cells, keys, aggregation):
+    grouped = cells.groupby(keys, sort=False)
+    result = grouped.agg(aggregation)
+    # A sum over no values is 0; keep it missing (e.g. app opens by brand)
+    result = result.where(grouped[list(aggregation)].count() > 0)
+    return result.reset_index()
+
+
+def _roll_up_time(cells, measures):
+    aggregation = {measure: TIME_AGGREGATION[measure] for measure in measures}
+    cells = cells.sort_values(['years', 'Quarter'], kind='stable')
+    keys = ['parent', 'member', 'category']
+    by_year = _aggregate(cells, keys + ['years'], aggregation)
+    overall = _aggregate(cells, keys, aggregation)
+    return pd.concat([cells, by_year.assign(Quarter=0), overall.assign(years=0, Quarter=0)], ignore_index=True)
+
+
+def build_cube(tables):
+    # tables: dimension and fact frames by name (in memory after extraction,
+    # or read back from MySQL / a snapshot). Returns the cube cells.
+    state_names = dict(zip(tables['dim_state']['state_id'], tables['dim_state']['state_name']))
+    district_names = dict(zip(tables['dim_district']['district_id'], tables['dim_district']['district_name']))
+
+    frames = []
+    for domain, levels in SOURCES.items():
+        measures = DOMAIN_MEASURES[domain]
+        by_level = {level: _level_cells(tables, level, sources) for level, sources in levels.items()}
+        country = by_level['state'].groupby(['years', 'Quarter', 'category'], as_index=False).sum(min_count=1)
+        by_level['country'] = country.assign(parent=0, member=0)
+
+        for level in LEVELS:
+            # Pincodes only have some measures (no app opens); the rest stay NaN
+            present = [measure for measure in measures if measure in by_level[level]]
+            cells = by_level[level][['parent', 'member', 'years', 'Quarter', 'category'] + present]
+            cells = _roll_up_time(cells, present)
+            # Labels are joined once here, not on every lookup
+            if level == 'country':
+                cells['name'] = 'India'
+            elif level == 'state':
+                cells['name'] = cells['member'].map(state_names)
+            elif level == 'district':
+                cells['name'] = cells['member'].map(district_names)
+            else:
+                cells['name'] = cells['member'].astype(str)
+            frames.append(cells.assign(domain=domain, level=level))
+
+    cube = pd.concat(frames, ignore_index=True).reindex(columns=COLUMNS)
+    cube = cube.astype({'parent': 'int32', 'member': 'int32', 'years': 'int16', 'Quarter': 'int8'})
+    return cube.sort_values(KEY + ['member'], ignore_index=True)
+
+
+class Cube:
+    # Lookup side of the cube. Cells are sorted by KEY (largest first within
+    # a key) once, and the row range of every key is kept in a dict, so one
+    # drill-down step (the members of a level under a parent for a period
+    # and category) is a dict lookup and a contiguous slice. Finished slices
+    # are memoised.
+
+    def __init__(self, cells):
+        lead = cells['count'].where(cells['domain'] != 'users', cells['registered_users'])
+        order = cells.assign(_lead=lead).sort_values(KEY + ['_lead'], ascending=[True] * len(KEY) + [False],
+                                                     na_position='last', kind='stable').index
+        self.cells = cells.loc[order].reset_index(drop=True)
+
+        # Per domain, only the columns a slice returns
+        self.frames = {domain: self.cells[['member', 'name'] + measures]
+                       for domain, measures in DOMAIN_MEASURES.items()}
+        keys = list(zip(*(self.cells[column].tolist() for column in KEY)))
+        self.ranges = {}
+        start = 0
+        for position in range(1, len(keys) + 1):
+            if position == len(keys) or keys[position] != keys[start]:
+                self.ranges[keys[start]] = (start, position)
+                start = position
+        self._slices = {}
+
+    def slice(self, domain, level, parent=0, year=None, quarter=None, category=ALL):
+        key = (domain, level, int(parent), int(year or 0), int(quarter or 0), category)
+        result = self._slices.get(key)
+        if result is None:
+            start, stop = self.ranges.get(key, (0, 0))
+            result = self.frames[domain].iloc[start:stop]
+            self._slices[key] = result
+        return result
+
+    def years(self, domain):
+        return sorted({key[3] for key in self.ranges if key[0] == domain and key[3] != 0})
+
+    def categories(self, domain):
+        return sorted({key[5] for key in self.ranges if key[0] == domain and key[1] == 'country'})
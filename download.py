@@ -0,0 +1,138 @@
+import os
+import time
+import uuid
+import shutil
+
+from naming import slug
+from queries import stream_view
+
+# Exports are written under Streamlit's static folder and downloaded from
+# there, so the browser streams them from disk instead of the app holding
+# the file in memory (as st.download_button would). Each export gets an
+# unguessable directory and is removed after EXPORT_TTL seconds.
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'exports')
+EXPORT_URL = 'app/static/exports'
+EXPORT_TTL = 3600
+
+# Streamlit refuses to serve static files over 200 MiB, so larger exports
+# are split into parts of at most PART_BYTES, each a complete file (CSV
+# with its header, Parquet with its footer). The margin covers the Parquet
+# footer and a row group larger than the previous one.
+PART_BYTES = 190 * 2**20
+
+CHUNK_ROWS = 50000
+
+FORMATS = {'csv': '.csv', 'parquet': '.parquet'}
+
+
+def _part_path(path, part):
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.part{part}{extension}"
+
+
+def _name_parts(path, parts):
+    # A single part keeps the plain name
+    if len(parts) == 1:
+        os.replace(parts[0], path)
+        return [path]
+    return parts
+
+
+def write_csv(chunks, path, part_bytes=PART_BYTES):
+    # Returns (rows, part paths)
+    rows = 0
+    parts = []
+    output = None
+    try:
+        for chunk in chunks:
+            text = chunk.to_csv(index=False, header=False).encode()
+            if output is None or (output.tell() > 0 and output.tell() + len(text) > part_bytes):
+                if output is not None:
+                    output.close()
+                parts.append(_part_path(path, len(parts) + 1))
+                output = open(parts[-1], 'wb')
+                output.write(chunk.head(0).to_csv(index=False).encode())
+            output.write(text)
+            rows += len(chunk)
+    finally:
+        if output is not None:
+            output.close()
+    if not parts:
+        # No chunks at all (stream_view sources yield an empty chunk with
+        # the columns instead): still leave a readable (empty) file
+        open(path, 'w').close()
+        return rows, [path]
+    return rows, _name_parts(path, parts)
+
+
+def write_parquet(chunks, path, part_bytes=PART_BYTES):
+    # One row group per chunk. The schema is fixed by the first chunk; the
+    # chunks come typed from the cursor metadata (or Arrow), so a chunk
+    # whose column is all NULL still has that column's type.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    parts = []
+    schema = None
+    sink = writer = None
+    last_group = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False, schema=schema)
+            schema = table.schema
+            if writer is not None and sink.tell() + last_group > part_bytes:
+                writer.close()
+                sink.close()
+                writer = None
+            if writer is None:
+                parts.append(_part_path(path, len(parts) + 1))
+                sink = pa.OSFile(parts[-1], 'wb')
+                writer = pq.ParquetWriter(sink, schema)
+            before = sink.tell()
+            writer.write_table(table)
+            last_group = sink.tell() - before
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+            sink.close()
+    if not parts:
+        # Only when chunks yielded nothing at all: stream_view sources yield
+        # an empty chunk for an empty result, which is written above with
+        # its schema
+        pq.write_table(pa.table({}), path)
+        return rows, [path]
+    return rows, _name_parts(path, parts)
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet}
+
+
+def prune(directory=EXPORT_DIR, ttl=EXPORT_TTL):
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - ttl
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def export_view(function, query_type, data_format='csv', chunk_rows=CHUNK_ROWS, **params):
+    # Stream one view's full result to a file (or parts of at most
+    # PART_BYTES) and return where to fetch them
+    prune()
+    token = uuid.uuid4().hex
+    os.makedirs(os.path.join(EXPORT_DIR, token))
+    label = ' '.join([query_type] + [str(params[key]) for key in ('year', 'state') if params.get(key)])
+    name = slug(label) + FORMATS[data_format]
+    path = os.path.join(EXPORT_DIR, token, name)
+
+    start = time.perf_counter()
+    rows, paths = WRITERS[data_format](stream_view(function, query_type, chunk_rows, **params), path)
+    seconds = time.perf_counter() - start
+    parts = [{'name': os.path.basename(part), 'url': f"{EXPORT_URL}/{token}/{os.path.basename(part)}",
+              'bytes': os.path.getsize(part)} for part in paths]
+    return {'name': name, 'parts': parts, 'rows': rows, 'seconds': seconds,
+            'bytes': sum(part['bytes'] for part in parts)}
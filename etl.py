@@ -0,0 +1,612 @@
+import os
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import pymysql
+
+from naming import version_stamp
+from extract import parse_json, new_column, iter_pulse_files
+from cube import build_cube, CUBE_DDL
+from forecast import build_forecasts, FORECAST_DDL
+from preview import build_previews, PREVIEW_DDL
+from queries import get_connection, QUERY_FUNCTIONS, QUERY_TYPES
+
+logger = logging.getLogger(__name__)
+
+# Root of the cloned PhonePe Pulse repository (the "pulse/data" folder)
+DATA_PATH = os.environ.get('PULSE_DATA_PATH', r'C:/Users/sanju/OneDrive/Desktop/PhonePe/pulse/data')
+
+YEARS = [str(year) for year in range(2018, 2025)]
+FILES_PER_YEAR = [f"{j}.json" for j in range(1, 5)]
+
+
+# Name cleaning shared by every loader
+def clean_state_name(state):
+    # "andaman-&-nicobar-islands" -> "Andaman & Nicobar Islands"
+    return state.replace("-", " ").title()
+
+def clean_district_name(name):
+    # map/* files say "north goa district", top/* files say "north goa"
+    name = name.strip().lower()
+    if name.endswith(' district'):
+        name = name[:-len(' district')]
+    return name.title()
+
+
+class Dimensions:
+    # Integer surrogate keys for states, districts and pincodes.
+    # Built once per ETL run and shared by all twelve loaders so that the
+    # same district gets the same id in map_* and top_* tables.
+
+    def __init__(self):
+        self.states = {}      # state name -> state_id
+        self.districts = {}   # (state_id, district name) -> district_id
+        self.pincodes = {}    # pincode -> state_id
+        # ids up to these were loaded from MySQL and must never change
+        self.fixed_states = 0
+        self.fixed_districts = 0
+        self.last_state = 0
+        self.last_district = 0
+
+    def state_id(self, state):
+        name = clean_state_name(state)
+        if name not in self.states:
+            self.last_state += 1
+            self.states[name] = self.last_state
+        return self.states[name]
+
+    def district_id(self, state_id, name):
+        key = (state_id, clean_district_name(name))
+        if key not in self.districts:
+            self.last_district += 1
+            self.districts[key] = self.last_district
+        return self.districts[key]
+
+    def pincode(self, state_id, value):
+        # Pincodes are already 6 digit integers, so they are their own key
+        if value in (None, ''):
+            return None
+        pincode = int(value)
+        self.pincodes.setdefault(pincode, state_id)
+        return pincode
+
+    @classmethod
+    def from_database(cls, mydb):
+        # Reuse the ids already stored in MySQL so an incremental load keeps
+        # existing facts pointing at the right states and districts
+        dims = cls()
+        mycursor = mydb.cursor()
+        mycursor.execute("SELECT state_id, state_name FROM dim_state")
+        dims.states = {name: state_id for state_id, name in mycursor.fetchall()}
+        mycursor.execute("SELECT district_id, state_id, district_name FROM dim_district")
+        dims.districts = {(state_id, name): district_id for district_id, state_id, name in mycursor.fetchall()}
+        mycursor.execute("SELECT pincode, state_id FROM dim_pincode")
+        dims.pincodes = dict(mycursor.fetchall())
+        dims.fixed_states = dims.last_state = max(dims.states.values(), default=0)
+        dims.fixed_districts = dims.last_district = max(dims.districts.values(), default=0)
+        return dims
+
+    def finalize(self, facts):
+        # Ids are handed out in the order files are read, which differs
+        # between a directory walk and an archive. Renumber the members added
+        # in this run in sorted order and rewrite the fact tables to match.
+        state_map = np.arange(self.last_state + 1, dtype='int16')
+        new_states = sorted(name for name, state_id in self.states.items() if state_id > self.fixed_states)
+        for new_id, name in enumerate(new_states, start=self.fixed_states + 1):
+            state_map[self.states[name]] = new_id
+            self.states[name] = new_id
+
+        districts = {(int(state_map[state_id]), name): district_id
+                     for (state_id, name), district_id in self.districts.items()}
+        district_map = np.arange(self.last_district + 1, dtype='int16')
+        new_districts = sorted(key for key, district_id in districts.items() if district_id > self.fixed_districts)
+        for new_id, key in enumerate(new_districts, start=self.fixed_districts + 1):
+            district_map[districts[key]] = new_id
+            districts[key] = new_id
+        self.districts = districts
+
+        self.pincodes = {pincode: int(state_map[state_id]) for pincode, state_id in sorted(self.pincodes.items())}
+
+        for table, df in facts.items():
+            df['state_id'] = state_map[df['state_id'].to_numpy()]
+            if 'district_id' in df:
+                df['district_id'] = district_map[df['district_id'].to_numpy()]
+            # Stable sort keeps each file's records in JSON order
+            facts[table] = df.sort_values(['state_id', 'years', 'Quarter'], kind='stable', ignore_index=True)
+        return facts
+
+    def frames(self):
+        dim_state = pd.DataFrame(
+            [(state_id, name) for name, state_id in self.states.items()],
+            columns=['state_id', 'state_name'])
+        dim_district = pd.DataFrame(
+            [(district_id, state_id, name) for (state_id, name), district_id in self.districts.items()],
+            columns=['district_id', 'state_id', 'district_name'])
+        dim_pincode = pd.DataFrame(
+            list(self.pincodes.items()),
+            columns=['pincode', 'state_id'])
+        return {'dim_state': dim_state, 'dim_district': dim_district, 'dim_pincode': dim_pincode}
+
+
+# Record extractors: each yields (key, value, value...) for one JSON file
+
+def _transaction_rows(json_data):
+    for i in json_data['data']['transactionData']:
+        yield i['name'], i['paymentInstruments'][0]['count'], i['paymentInstruments'][0]['amount']
+
+def _device_rows(json_data):
+    for i in json_data['data']['usersByDevice'] or []:
+        yield i['brand'], i['count'], i['percentage']
+
+def _hover_list_rows(json_data):
+    for i in json_data['data']['hoverDataList']:
+        yield i['name'], i['metric'][0]['count'], i['metric'][0]['amount']
+
+def _hover_user_rows(json_data):
+    for district_name, metric in json_data['data']['hoverData'].items():
+        yield district_name, metric['registeredUsers'], metric['appOpens']
+
+def _top_rows(level):
+    def rows(json_data):
+        for i in json_data['data'][level]:
+            yield i['entityName'], i['metric']['count'], i['metric']['amount']
+    return rows
+
+def _top_user_rows(level):
+    def rows(json_data):
+        for i in json_data['data'][level]:
+            yield i['name'], i['registeredUsers']
+    return rows
+
+
+# The twelve Pulse tables. "key" says how the first extracted field is stored:
+# category (kept as text), district (district_id) or pincode (integer pincode).
+TABLES = {
+    'aggregated_transaction': {
+        'path': 'aggregated/transaction/country/india/state',
+        'key': 'category', 'rows': _transaction_rows,
+        'columns': ['Transaction_type', 'Transaction_count', 'Transaction_amount'],
+    },
+    'aggregated_user': {
+        'path': 'aggregated/user/country/india/state',
+        'key': 'category', 'rows': _device_rows,
+        'columns': ['User_brand', 'User_count', 'User_percentage'],
+    },
+    'aggregated_insurance': {
+        'path': 'aggregated/insurance/country/india/state',
+        'key': 'category', 'rows': _transaction_rows,
+        'columns': ['Name', 'count', 'amount'],
+    },
+    'map_transaction': {
+        'path': 'map/transaction/hover/country/india/state',
+        'key': 'district', 'rows': _hover_list_rows,
+        'columns': ['district_id', 'Transaction_count', 'Transaction_amount'],
+    },
+    'map_user': {
+        'path': 'map/user/hover/country/india/state',
+        'key': 'district', 'rows': _hover_user_rows,
+        'columns': ['district_id', 'registered_user', 'appOpens'],
+    },
+    'map_insurance': {
+        'path': 'map/insurance/hover/country/india/state',
+        'key': 'district', 'rows': _hover_list_rows,
+        'columns': ['district_id', 'Count', 'amount'],
+    },
+    'top_transaction_district': {
+        'path': 'top/transaction/country/india/state',
+        'key': 'district', 'rows': _top_rows('districts'),
+        'columns': ['district_id', 'Transaction_count', 'Transaction_amount'],
+    },
+    'top_transaction_pincode': {
+        'path': 'top/transaction/country/india/state',
+        'key': 'pincode', 'rows': _top_rows('pincodes'),
+        'columns': ['pincode', 'Transaction_count', 'Transaction_amount'],
+    },
+    'top_user_district': {
+        'path': 'top/user/country/india/state',
+        'key': 'district', 'rows': _top_user_rows('districts'),
+        'columns': ['district_id', 'registeredUsers'],
+    },
+    'top_user_pincode': {
+        'path': 'top/user/country/india/state',
+        'key': 'pincode', 'rows': _top_user_rows('pincodes'),
+        'columns': ['pincode', 'registeredUsers'],
+    },
+    'top_insurance_districts': {
+        'path': 'top/insurance/country/india/state',
+        'key': 'district', 'rows': _top_rows('districts'),
+        'columns': ['district_id', 'count', 'amount'],
+    },
+    'top_insurance_pincode': {
+        'path': 'top/insurance/country/india/state',
+        'key': 'pincode', 'rows': _top_rows('pincodes'),
+        'columns': ['pincode', 'count', 'amount'],
+    },
+}
+
+
+# In-memory type of every fact column while extracting
+COLUMN_DTYPES = {
+    'state_id': 'int16',
+    'years': 'int16',
+    'Quarter': 'int16',
+    'district_id': 'int16',
+    'pincode': 'Int32',
+    'Transaction_type': 'category',
+    'User_brand': 'category',
+    'Name': 'category',
+    'Transaction_count': 'int64',
+    'Transaction_amount': 'float64',
+    'User_count': 'int64',
+    'User_percentage': 'float64',
+    'registered_user': 'int64',
+    'appOpens': 'int64',
+    'registeredUsers': 'int64',
+    'count': 'int64',
+    'Count': 'int64',
+    'amount': 'float64',
+}
+
+
+# What a file that doesn't match its table's layout raises while parsed:
+# missing keys, null sections, and values of the wrong type
+MALFORMED_FILE_ERRORS = (KeyError, IndexError, TypeError, AttributeError, ValueError)
+
+
+class TableBuilder:
+    # Typed columns for one fact table, filled one JSON file at a time
+
+    def __init__(self, table):
+        self.table = table
+        self.spec = TABLES[table]
+        self.columns = {name: new_column(COLUMN_DTYPES[name]) for name in fact_columns(table)}
+        self.key_column = self.spec['columns'][0]
+        self.value_columns = self.spec['columns'][1:]
+
+    def parse(self, json_data):
+        # Check and convert one file's records without touching the
+        # dimensions, so a malformed file never allocates ids for rows that
+        # are not written. Raises one of MALFORMED_FILE_ERRORS.
+        spec = self.spec
+        rows = list(spec['rows'](json_data))
+        if not rows:
+            return None
+        keys, *values = zip(*rows)
+        if spec['key'] == 'district':
+            for key in keys:
+                clean_district_name(key)
+        elif spec['key'] == 'pincode':
+            keys = [None if key in (None, '') else int(key) for key in keys]
+        values = [self.columns[name].prepare(column_values)
+                  for name, column_values in zip(self.value_columns, values)]
+        return keys, values
+
+    def add(self, parsed, dims, state_id, year, quarter):
+        if parsed is None:
+            return
+        keys, values = parsed
+        columns = self.columns
+        if self.spec['key'] == 'district':
+            keys = [dims.district_id(state_id, key) for key in keys]
+        elif self.spec['key'] == 'pincode':
+            keys = [dims.pincode(state_id, key) for key in keys]
+        keys = columns[self.key_column].prepare(keys)
+
+        n = len(keys)
+        columns['state_id'].fill(state_id, n)
+        columns['years'].fill(int(year), n)
+        columns['Quarter'].fill(quarter, n)
+        columns[self.key_column].extend(keys)
+        for name, column_values in zip(self.value_columns, values):
+            columns[name].extend(column_values)
+
+    def finish(self):
+        return pd.DataFrame({name: column.finish() for name, column in self.columns.items()}, copy=False)
+
+
+def extract_tables(tables, data_path=DATA_PATH, dims=None, years=YEARS, workers=1):
+    # data_path is the pulse/data folder or an archive of the Pulse repository.
+    # Files are read once each, even when several tables come from the same
+    # folder (top/* districts and pincodes).
+    dims = dims or Dimensions()
+    builders = {table: TableBuilder(table) for table in tables}
+    by_prefix = {}
+    for table in tables:
+        by_prefix.setdefault(TABLES[table]['path'], []).append(builders[table])
+
+    for prefix, state, year, quarter, raw in iter_pulse_files(data_path, list(by_prefix), years, workers):
+        path = f"{prefix}/{state}/{year}/{quarter}.json"
+        try:
+            json_data = parse_json(raw)
+        except ValueError as error:
+            logger.warning("Skipping %s: invalid JSON (%s)", path, error)
+            continue
+        # Every table's records are checked before the state gets an id
+        parsed = []
+        for builder in by_prefix[prefix]:
+            try:
+                parsed.append((builder, builder.parse(json_data)))
+            except MALFORMED_FILE_ERRORS as error:
+                logger.warning("Skipping %s for %s: unexpected layout (%r)", path, builder.table, error)
+        if not parsed:
+            continue
+        state_id = dims.state_id(state)
+        for builder, records in parsed:
+            builder.add(records, dims, state_id, year, quarter)
+
+    facts = {table: builder.finish() for table, builder in builders.items()}
+    return dims, dims.finalize(facts)
+
+
+def load_table(table, dims=None, data_path=DATA_PATH, years=YEARS):
+    return extract_tables([table], data_path, dims, years)[1][table]
+
+
+def extract_all(data_path=DATA_PATH, dims=None, years=YEARS, workers=1):
+    return extract_tables(list(TABLES), data_path, dims, years, workers)
+
+
+# Table definitions. Facts reference the dimensions by integer key instead of
+# repeating VARCHAR state/district names on every row.
+
+DIMENSION_DDL = {
+    'dim_state': """CREATE TABLE dim_state(state_id TINYINT UNSIGNED PRIMARY KEY,
+                                            state_name VARCHAR(250) NOT NULL)""",
+    'dim_district': """CREATE TABLE dim_district(district_id SMALLINT UNSIGNED PRIMARY KEY,
+                                                  state_id TINYINT UNSIGNED NOT NULL,
+                                                  district_name VARCHAR(250) NOT NULL,
+                                                  KEY (state_id))""",
+    'dim_pincode': """CREATE TABLE dim_pincode(pincode MEDIUMINT UNSIGNED PRIMARY KEY,
+                                                state_id TINYINT UNSIGNED NOT NULL,
+                                                KEY (state_id))""",
+}
+
+COLUMN_TYPES = {
+    'state_id': 'TINYINT UNSIGNED NOT NULL',
+    'years': 'SMALLINT NOT NULL',
+    'Quarter': 'TINYINT NOT NULL',
+    'district_id': 'SMALLINT UNSIGNED',
+    'pincode': 'MEDIUMINT UNSIGNED',
+    'Transaction_type': 'VARCHAR(250)',
+    'User_brand': 'VARCHAR(250)',
+    'Name': 'VARCHAR(250)',
+    'Transaction_count': 'BIGINT',
+    'Transaction_amount': 'BIGINT',
+    'User_count': 'BIGINT',
+    'User_percentage': 'FLOAT',
+    'registered_user': 'INT',
+    'appOpens': 'BIGINT',
+    'registeredUsers': 'INT',
+    'count': 'INT',
+    'Count': 'INT',
+    'amount': 'BIGINT',
+}
+
+# The large, fast growing tables are RANGE partitioned by year so that
+# single-year views only read one partition and a new quarter only rewrites
+# the current year's partition. aggregated_transaction is small but the
+# year-filtered Trend Analysis view reads it, so it is partitioned too.
+PARTITIONED_TABLES = ['aggregated_transaction', 'map_transaction', 'map_user', 'top_transaction_pincode',
+                      'top_user_pincode', 'top_insurance_pincode']
+
+def partition_name(year):
+    return f"p{year}"
+
+def partition_ddl(years=YEARS):
+    partitions = [f"PARTITION {partition_name(year)} VALUES LESS THAN ({int(year) + 1})" for year in years]
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return " PARTITION BY RANGE (years) (" + ", ".join(partitions) + ")"
+
+def fact_columns(table):
+    return ['state_id', 'years', 'Quarter'] + TABLES[table]['columns']
+
+def fact_ddl(table):
+    columns = fact_columns(table)
+    definitions = [f"`{name}` {COLUMN_TYPES[name]}" for name in columns]
+    # Every dashboard query groups by state (and district/pincode) first
+    definitions.append(f"KEY (state_id, `{columns[3]}`, years, Quarter)")
+    definitions.append("KEY (years, Quarter)")
+    ddl = f"CREATE TABLE {table}(" + ", ".join(definitions) + ")"
+    if table in PARTITIONED_TABLES:
+        ddl += partition_ddl()
+    return ddl
+
+
+def _insert(mycursor, table, columns, df):
+    insert_query = (f"INSERT INTO {table}(" + ",".join(f"`{c}`" for c in columns) + ") VALUES ("
+                    + ",".join(["%s"] * len(columns)) + ")")
+    # NaN/None pincodes must reach MySQL as NULL
+    data = df[columns].astype(object).where(df[columns].notna(), None).values.tolist()
+    mycursor.executemany(insert_query, data)
+
+
+def write_dimensions(mydb, dims, replace=True):
+    mycursor = mydb.cursor()
+    for table, df in dims.frames().items():
+        if replace:
+            mycursor.execute(f"DROP TABLE IF EXISTS {table}")
+            mycursor.execute(DIMENSION_DDL[table])
+            _insert(mycursor, table, list(df.columns), df)
+        else:
+            # Existing ids never change, so only new members get inserted
+            columns = list(df.columns)
+            insert_query = (f"INSERT IGNORE INTO {table}(" + ",".join(columns) + ") VALUES ("
+                            + ",".join(["%s"] * len(columns)) + ")")
+            mycursor.executemany(insert_query, df.astype(object).values.tolist())
+        mydb.commit()
+
+
+def write_tables(mydb, dims, facts):
+    write_dimensions(mydb, dims)
+
+    mycursor = mydb.cursor()
+    for table, df in facts.items():
+        mycursor.execute(f"DROP TABLE IF EXISTS {table}")
+        mycursor.execute(fact_ddl(table))
+        _insert(mycursor, table, fact_columns(table), df)
+        mydb.commit()
+
+
+def ensure_year_partition(mydb, table, year):
+    mycursor = mydb.cursor()
+    mycursor.execute(
+        "SELECT COUNT(*) FROM information_schema.partitions "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND partition_name = %s",
+        (table, partition_name(year)))
+    if mycursor.fetchone()[0] == 0:
+        # Split the new year off the catch-all partition
+        mycursor.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ("
+            f"PARTITION {partition_name(year)} VALUES LESS THAN ({int(year) + 1}), "
+            f"PARTITION pmax VALUES LESS THAN MAXVALUE)")
+
+
+def reload_year(mydb, table, df, year):
+    # Replace one year of a fact table with freshly extracted rows
+    mycursor = mydb.cursor()
+    columns = fact_columns(table)
+    df = df[df['years'] == int(year)]
+
+    if table in PARTITIONED_TABLES:
+        # Build the year in a staging table and swap it in with
+        # EXCHANGE PARTITION so readers never see a half-loaded quarter
+        ensure_year_partition(mydb, table, year)
+        stage = f"{table}_stage"
+        mycursor.execute(f"DROP TABLE IF EXISTS {stage}")
+        mycursor.execute(f"CREATE TABLE {stage} LIKE {table}")
+        mycursor.execute(f"ALTER TABLE {stage} REMOVE PARTITIONING")
+        _insert(mycursor, stage, columns, df)
+        mydb.commit()
+        mycursor.execute(f"ALTER TABLE {table} EXCHANGE PARTITION {partition_name(year)} WITH TABLE {stage}")
+        mycursor.execute(f"DROP TABLE {stage}")
+    else:
+        mycursor.execute(f"DELETE FROM {table} WHERE years = %s", (int(year),))
+        _insert(mycursor, table, columns, df)
+    mydb.commit()
+
+
+def read_tables(mydb, names):
+    return {table: pd.read_sql(f"SELECT * FROM {table}", mydb) for table in names}
+
+
+def write_derived(mydb, table, ddl, df):
+    # Tables derived from all years (cube, forecasts) are rebuilt on every
+    # load; they are small next to the facts
+    mycursor = mydb.cursor()
+    mycursor.execute(f"DROP TABLE IF EXISTS {table}")
+    mycursor.execute(ddl)
+    _insert(mycursor, table, list(df.columns), df)
+    mydb.commit()
+
+
+def stamp_dataset_version(mydb):
+    # Changes on every load, so cached dashboard results of older data are
+    # never served again
+    version = version_stamp()
+    mycursor = mydb.cursor()
+    mycursor.execute("CREATE TABLE IF NOT EXISTS dataset_version(version VARCHAR(64) NOT NULL)")
+    mycursor.execute("DELETE FROM dataset_version")
+    mycursor.execute("INSERT INTO dataset_version(version) VALUES (%s)", (version,))
+    mydb.commit()
+    return version
+
+
+def explain_partitions(mydb, query, params=None):
+    # Partitions read per table, from the "partitions" column of EXPLAIN
+    mycursor = mydb.cursor(pymysql.cursors.DictCursor)
+    mycursor.execute("EXPLAIN " + query, params)
+    return [(row['table'], row['partitions']) for row in mycursor.fetchall()]
+
+
+def explain_year_views(mydb, year, year_views):
+    # (query function, query_type) -> partitions each fact table is read
+    # from, for every view that is filtered by year (charts.YEAR_VIEWS)
+    plans = {}
+    for function, query_type in year_views:
+        query, params = QUERY_FUNCTIONS[function].sql(query_type, year=year)
+        plans[(function, query_type)] = [(table, partitions) for table, partitions
+                                         in explain_partitions(mydb, query, params) if table in TABLES]
+    return plans
+
+
+def publish_snapshot(directory, dims=None, facts=None):
+    # Publish dimensions, facts and every dashboard view as a new Arrow
+    # snapshot version. Without in-memory frames (e.g. after a single year
+    # reload) the tables are read back from MySQL.
+    import snapshot   # pyarrow is only needed for snapshots
+
+    if dims is None or facts is None:
+        mydb = get_connection()
+        try:
+            tables = read_tables(mydb, list(DIMENSION_DDL) + list(TABLES))
+        finally:
+            mydb.close()
+    else:
+        tables = dict(dims.frames())
+        tables.update(facts)
+    tables['olap_cube'] = build_cube(tables)
+    tables['forecast'] = build_forecasts(tables)
+
+    # run_sql queries MySQL even if this process serves from a snapshot
+    views = {(name, query_type): QUERY_FUNCTIONS[name].run_sql(query_type)
+             for name, query_types in QUERY_TYPES.items() for query_type in query_types}
+    return snapshot.publish(directory, tables, views)
+
+
+def run_etl(data_path=DATA_PATH, year=None, workers=1):
+    mydb = get_connection()
+    try:
+        if year is None:
+            dims, facts = extract_all(data_path, workers=workers)
+            write_tables(mydb, dims, facts)
+            tables = dict(dims.frames())
+            tables.update(facts)
+        else:
+            # New Pulse release: reload only the given year
+            dims, facts = extract_all(data_path, Dimensions.from_database(mydb), [str(year)], workers)
+            write_dimensions(mydb, dims, replace=False)
+            for table, df in facts.items():
+                reload_year(mydb, table, df, year)
+            # The cube's all-years roll-ups and the forecasts need every
+            # year, not just this one
+            tables = read_tables(mydb, list(DIMENSION_DDL) + list(TABLES))
+        write_derived(mydb, 'olap_cube', CUBE_DDL, build_cube(tables))
+        write_derived(mydb, 'forecast', FORECAST_DDL, build_forecasts(tables))
+        stamp_dataset_version(mydb)
+        # Runs the heavy views once, on the data just loaded
+        write_derived(mydb, 'view_preview', PREVIEW_DDL, build_previews())
+    finally:
+        mydb.close()
+    return dims, facts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load PhonePe Pulse JSON data into MySQL')
+    parser.add_argument('data_path', nargs='?', default=DATA_PATH,
+                        help='path to the pulse/data folder, or a zip/tar(.gz/.zst) of the Pulse repository')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='threads reading and decompressing files')
+    parser.add_argument('--year', type=int,
+                        help='only reload this year (e.g. after a new quarterly release)')
+    parser.add_argument('--snapshot', metavar='DIR',
+                        help='after loading, publish an Arrow snapshot for the dashboard to DIR')
+    parser.add_argument('--explain-year', type=int,
+                        help='print the partitions each year-filtered dashboard view reads for this year')
+    args = parser.parse_args()
+
+    if args.explain_year:
+        import charts   # only for the list of year-filtered views
+        mydb = get_connection()
+        try:
+            for view, plan in explain_year_views(mydb, args.explain_year, charts.YEAR_VIEWS).items():
+                print(' / '.join(view), plan)
+        finally:
+            mydb.close()
+    else:
+        dims, facts = run_etl(args.data_path, args.year, args.workers)
+        if args.snapshot:
+            if args.year is None:
+                publish_snapshot(args.snapshot, dims, facts)
+            else:
+                publish_snapshot(args.snapshot)
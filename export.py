@@ -0,0 +1,204 @@
+import os
+import html
+import time
+import argparse
+import warnings
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+# Headless backend: must be selected before pyplot is imported (by charts)
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import geo
+import charts
+from cube import DOMAIN_MEASURES
+from naming import slug
+from queries import get_years, get_states, get_cube, MAP_MEASURES, QUERY_TYPES, QUERY_FUNCTIONS
+
+warnings.filterwarnings('ignore')
+
+# Written once to the report root and referenced by every Plotly page,
+# instead of embedding the ~4 MB bundle in each file
+PLOTLY_JS = 'plotly.min.js'
+
+# Section of the Drill-Down Explorer, which reads the cube instead of a
+# query function
+DRILL_DOWN = "Drill-Down Explorer"
+
+
+def list_map_views(section, function, query_type):
+    # India for all years and each year; for districts also every state
+    # with its own (finer) boundaries, for all years
+    metric, level = query_type.rsplit(' by ', 1)
+    level = level.lower()
+    if not geo.geometry_available(level):
+        return []
+    views = [(section, function, query_type, {'year': year})
+             for year in [None] + get_years(MAP_MEASURES[metric][0])]
+    if level == 'district':
+        for state in get_states():
+            if geo.geometry_available(level, state):
+                views.append((section, function, query_type, {'state': state}))
+    return views
+
+
+def list_drill_down_views():
+    # What the explorer shows for all years: every measure by state, and
+    # each state's districts and top pincodes by the domain's first measure
+    cube = get_cube()
+    views = []
+    for domain, measures in DOMAIN_MEASURES.items():
+        for measure in measures:
+            views.append((DRILL_DOWN, 'drill_down', f"{domain.title()} by State ({measure.replace('_', ' ')})",
+                          {'domain': domain, 'measure': measure, 'level': 'state'}))
+        states = cube.slice(domain, 'state')
+        for parent, state in sorted(zip(states['member'], states['name']), key=lambda item: item[1]):
+            for level in ('district', 'pincode'):
+                views.append((DRILL_DOWN, 'drill_down', f"{domain.title()} in {state} by {level.title()}",
+                              {'domain': domain, 'measure': measures[0], 'level': level, 'parent': int(parent)}))
+    return views
+
+
+def list_views():
+    # Every (section, query function, query_type, params) the dashboard can
+    # show. Views that need a year are exported once per year; views where
+    # the year is optional are exported for all years. Map views are
+    # included when their boundaries are built, then the drill-down explorer.
+    views = []
+    for section, function in charts.SECTIONS.items():
+        for query_type in QUERY_TYPES[function]:
+            if function == 'get_map_analysis':
+                views.extend(list_map_views(section, function, query_type))
+            elif (function, query_type) in charts.YEAR_VIEWS:
+                table, all_years = charts.YEAR_VIEWS[(function, query_type)]
+                for year in [None] if all_years else get_years(table):
+                    views.append((section, function, query_type, {'year': year}))
+            else:
+                views.append((section, function, query_type, {}))
+    return views + list_drill_down_views()
+
+
+def view_name(query_type, params):
+    suffix = ''.join(f"__{params[key]}" for key in ('year', 'state') if params.get(key))
+    return slug(query_type + suffix)
+
+
+def export_view(view, output):
+    # Runs in a worker process: query, draw and save one view
+    section, function, query_type, params = view
+    year = params.get('year')
+    state = params.get('state')
+    result = {'section': section, 'query_type': query_type, 'year': '' if year is None else str(year),
+              'state': state or '', 'files': [], 'rows': None, 'query_seconds': None,
+              'render_seconds': None, 'error': None}
+    try:
+        start = time.perf_counter()
+        if function == 'drill_down':
+            df = get_cube().slice(params['domain'], params['level'], params.get('parent', 0))
+        else:
+            df = QUERY_FUNCTIONS[function](query_type=query_type, **params)
+        result['query_seconds'] = time.perf_counter() - start
+        result['rows'] = len(df)
+
+        start = time.perf_counter()
+        if function == 'get_map_analysis':
+            # A standalone page can't fetch the app's static files
+            figures = charts.map_view(df, query_type, inline=True, **params)
+        elif function == 'drill_down':
+            figures = charts.drill_down(df, params['measure'], f"{query_type} - All Years")
+        else:
+            figures = charts.draw(function, query_type, df, **params)
+        directory = os.path.join(output, slug(section))
+        os.makedirs(directory, exist_ok=True)
+        for number, figure in enumerate(figures, 1):
+            base = os.path.join(directory, f"{view_name(query_type, params)}_{number}")
+            if isinstance(figure, plt.Figure):
+                figure.savefig(base + '.png', dpi=100, bbox_inches='tight')
+                plt.close(figure)
+                path = base + '.png'
+            else:
+                figure.write_html(base + '.html', include_plotlyjs=f"../{PLOTLY_JS}", full_html=True)
+                path = base + '.html'
+            result['files'].append(os.path.relpath(path, output))
+        result['render_seconds'] = time.perf_counter() - start
+    except Exception as error:
+        # One broken view shouldn't cost the rest of the report
+        result['error'] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def view_title(result):
+    details = [value for value in (result['state'], result['year']) if value]
+    return result['query_type'] + (f" ({', '.join(details)})" if details else '')
+
+
+def write_index(output, results, wall_seconds):
+    lines = ["<!DOCTYPE html>", "<html><head><meta charset='utf-8'>",
+             "<title>PhonePe Pulse report</title>",
+             "<style>body{font-family:sans-serif;margin:2em} img{max-width:100%} "
+             "iframe{width:100%;height:620px;border:0} td,th{padding:2px 8px;text-align:left}</style>",
+             "</head><body>",
+             f"<h1>PhonePe Pulse report</h1><p>Generated {datetime.now():%Y-%m-%d %H:%M}"
+             f" in {wall_seconds:.1f}s.</p>"]
+
+    lines.append("<h2>Contents</h2><ul>")
+    for number, result in enumerate(results):
+        title = view_title(result)
+        lines.append(f"<li><a href='#view{number}'>{html.escape(result['section'])}: {html.escape(title)}</a></li>")
+    lines.append("</ul>")
+
+    section = None
+    for number, result in enumerate(results):
+        if result['section'] != section:
+            section = result['section']
+            lines.append(f"<h2>{html.escape(section)}</h2>")
+        title = view_title(result)
+        lines.append(f"<h3 id='view{number}'>{html.escape(title)}</h3>")
+        if result['error']:
+            lines.append(f"<p><b>Failed:</b> {html.escape(result['error'])}</p>")
+        for path in result['files']:
+            if path.endswith('.png'):
+                lines.append(f"<img src='{html.escape(path)}'>")
+            else:
+                lines.append(f"<iframe src='{html.escape(path)}' loading='lazy'></iframe>"
+                             f"<p><a href='{html.escape(path)}'>Open chart</a></p>")
+    lines.append("</body></html>")
+    with open(os.path.join(output, 'index.html'), 'w') as index:
+        index.write('\n'.join(lines))
+
+
+def export(output, workers=None):
+    import plotly.offline
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, PLOTLY_JS), 'w') as bundle:
+        bundle.write(plotly.offline.get_plotlyjs())
+
+    views = list_views()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(pool.map(export_view, views, [output] * len(views)))
+    wall_seconds = time.perf_counter() - start
+
+    write_index(output, results, wall_seconds)
+    timings = pd.DataFrame(results).drop(columns='files')
+    timings.to_csv(os.path.join(output, 'timings.csv'), index=False)
+    print(timings.drop(columns='error').to_string(index=False))
+
+    busy = timings['query_seconds'].sum() + timings['render_seconds'].sum()
+    failed = timings['error'].notna().sum()
+    print(f"{len(views)} views ({failed} failed) in {wall_seconds:.1f}s wall, "
+          f"{busy:.1f}s of work on {workers or os.cpu_count()} workers "
+          f"({busy / wall_seconds:.1f}x parallel)")
+    return timings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export every dashboard view to a static HTML/PNG report')
+    parser.add_argument('output', help='report directory (index.html, one folder per section)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+    export(args.output, args.workers)
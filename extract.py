@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import queue
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# orjson is optional; it parses the small Pulse files several times faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# zstandard is only needed for .tar.zst archives
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def parse_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def read_json(file_path):
+    with open(file_path, 'rb') as data:
+        return parse_json(data.read())
+
+
+class Column:
+    # Growable numpy-backed column. Capacity doubles when full, so appending
+    # a file's worth of values is one slice assignment instead of a Python
+    # list append per record.
+
+    def __init__(self, dtype, na_value=None, capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self.na_value = na_value   # stored in place of None; becomes <NA>
+        self.data = np.empty(capacity, dtype=self.dtype)
+        self.size = 0
+
+    def _reserve(self, n):
+        needed = self.size + n
+        if needed > len(self.data):
+            data = np.empty(max(needed, 2 * len(self.data)), dtype=self.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+    def prepare(self, values):
+        # Convert one file's values up front so a bad record can't leave
+        # the columns of a table with different lengths
+        if self.na_value is not None:
+            values = [self.na_value if value is None else value for value in values]
+        return np.asarray(values, dtype=self.dtype)
+
+    def extend(self, values):
+        n = len(values)
+        self._reserve(n)
+        self.data[self.size:self.size + n] = values
+        self.size += n
+
+    def fill(self, value, n):
+        # Per-file constants (state, year, quarter) are written once per file
+        self._reserve(n)
+        self.data[self.size:self.size + n] = value
+        self.size += n
+
+    def finish(self):
+        data = self.data[:self.size].copy()
+        self.data = None
+        if self.na_value is not None:
+            return pd.arrays.IntegerArray(data, data == self.na_value)
+        return data
+
+
+class CategoryColumn:
+    # Names (transaction types, device brands) stored as int32 codes into a
+    # list of distinct values
+
+    def __init__(self, capacity=1024):
+        self.categories = {}
+        self.codes = Column('int32', capacity=capacity)
+
+    def prepare(self, values):
+        categories = self.categories
+        return np.asarray([-1 if value is None else categories.setdefault(value, len(categories))
+                           for value in values], dtype='int32')
+
+    def extend(self, codes):
+        self.codes.extend(codes)
+
+    def finish(self):
+        # Sorted categories, so the result doesn't depend on file order
+        categorical = pd.Categorical.from_codes(self.codes.finish(), list(self.categories))
+        return categorical.reorder_categories(sorted(self.categories))
+
+
+def new_column(dtype):
+    # "category" -> CategoryColumn, "Int32"/"Int64" -> nullable integers
+    if dtype == 'category':
+        return CategoryColumn()
+    if dtype in ('Int16', 'Int32', 'Int64'):
+        return Column(dtype.lower(), na_value=-1)
+    return Column(dtype)
+
+
+# Reading Pulse files. A source is either the extracted pulse/data folder or
+# a zip / tar(.gz/.bz2/.xz/.zst) of the Pulse repository; files come back as
+# (prefix, state, year, quarter, raw bytes) for "<prefix>/<state>/<year>/<quarter>.json".
+
+def member_pattern(prefixes):
+    return re.compile(r'(?:^|/)(?P<prefix>' + '|'.join(re.escape(prefix) for prefix in prefixes)
+                      + r')/(?P<state>[^/]+)/(?P<year>\d{4})/(?P<quarter>[1-4])\.json$')
+
+def _member_key(pattern, name, years):
+    match = pattern.search(name)
+    if match is None or match['year'] not in years:
+        return None
+    return match['prefix'], match['state'], match['year'], int(match['quarter'])
+
+
+def _read_ordered(items, read, workers):
+    # read(item) for every (key, item), in order; with workers > 1 reads run
+    # in a thread pool with a bounded number of files in flight
+    if workers <= 1:
+        for key, item in items:
+            raw = read(item)
+            if raw is not None:
+                yield key + (raw,)
+        return
+
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque()
+        for key, item in items:
+            pending.append((key, pool.submit(read, item)))
+            if len(pending) >= workers * 16:
+                key, future = pending.popleft()
+                raw = future.result()
+                if raw is not None:
+                    yield key + (raw,)
+        while pending:
+            key, future = pending.popleft()
+            raw = future.result()
+            if raw is not None:
+                yield key + (raw,)
+
+
+def _prefetch(iterator, size):
+    # Run a sequential reader in a background thread so decompression
+    # overlaps with parsing
+    buffer = queue.Queue(size)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterator:
+                buffer.put(item)
+        except BaseException as error:
+            buffer.put(error)
+        buffer.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item = buffer.get()
+        if item is done:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _read_file(file_path):
+    # One open() per file; a missing quarter is not worth an extra stat call
+    try:
+        with open(file_path, 'rb') as data:
+            return data.read()
+    except FileNotFoundError:
+        return None
+
+def _iter_directory(root, prefixes, years, workers):
+    items = []
+    for prefix in prefixes:
+        base = os.path.join(root, prefix)
+        # A release without one of the folders just has no files for it,
+        # like an archive without matching members
+        if not os.path.isdir(base):
+            continue
+        for state in sorted(os.listdir(base)):
+            for year in years:
+                for quarter in range(1, 5):
+                    items.append(((prefix, state, year, quarter),
+                                  os.path.join(base, state, year, f"{quarter}.json")))
+    return _read_ordered(items, _read_file, workers)
+
+
+def _iter_zip(path, prefixes, years, workers):
+    pattern = member_pattern(prefixes)
+    with zipfile.ZipFile(path) as archive:
+        items = [(key, info) for info in archive.infolist()
+                 for key in [_member_key(pattern, info.filename, years)] if key]
+
+    # ZipFile objects aren't thread safe, so every reader thread opens its own
+    handles = []
+    local = threading.local()
+
+    def read(info):
+        if not hasattr(local, 'archive'):
+            local.archive = zipfile.ZipFile(path)
+            handles.append(local.archive)
+        return local.archive.read(info)
+
+    try:
+        yield from _read_ordered(items, read, workers)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def _iter_tar(path, prefixes, years, workers):
+    pattern = member_pattern(prefixes)
+    zstd = path.endswith(('.zst', '.tzst'))
+    if zstd and zstandard is None:
+        raise ImportError("reading .tar.zst archives requires the zstandard package")
+
+    def members():
+        # Tar streams are read front to back, one member at a time
+        with open(path, 'rb') as raw:
+            if zstd:
+                archive = tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(raw), mode='r|')
+            else:
+                archive = tarfile.open(fileobj=raw, mode='r|*')
+            with archive:
+                for info in archive:
+                    if not info.isfile():
+                        continue
+                    key = _member_key(pattern, info.name, years)
+                    if key:
+                        yield key + (archive.extractfile(info).read(),)
+
+    if workers > 1:
+        return _prefetch(members(), workers * 64)
+    return members()
+
+
+def iter_pulse_files(source, prefixes, years, workers=1):
+    years = set(years)
+    if os.path.isdir(source):
+        return _iter_directory(source, prefixes, sorted(years), workers)
+    if zipfile.is_zipfile(source):
+        return _iter_zip(source, prefixes, years, workers)
+    return _iter_tar(source, prefixes, years, workers)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Next-quarter forecasts for every state and district, fitted by the ETL and
+# stored in the forecast table. Each series is modelled on its last WINDOW
+# quarters as
+#   log(1 + y) = a + b * t + seasonal(quarter) + noise
+# which is a linear least-squares problem with the same design matrix for
+# every series, so all series are fitted at once: the normal equations of
+# each series are stacked into one (series x k x k) array and solved in a
+# single batched np.linalg.solve. Missing quarters get zero weight.
+HORIZON = 4
+WINDOW = 12
+MIN_OBSERVATIONS = 8
+
+# Dashboard label -> (fact table, column); the column is what the forecast
+# table stores as measure
+FORECAST_MEASURES = {
+    'Transaction Amount': ('map_transaction', 'Transaction_amount'),
+    'Transaction Count': ('map_transaction', 'Transaction_count'),
+    'Registered Users': ('map_user', 'registered_user'),
+    'App Opens': ('map_user', 'appOpens'),
+}
+
+# ~95% band from the residual spread of the fit (in log space)
+Z_95 = 1.96
+
+FORECAST_DDL = """CREATE TABLE forecast(level VARCHAR(16) NOT NULL,
+                                        measure VARCHAR(32) NOT NULL,
+                                        state_id TINYINT UNSIGNED NOT NULL,
+                                        district_id SMALLINT UNSIGNED NOT NULL,
+                                        years SMALLINT NOT NULL,
+                                        Quarter TINYINT NOT NULL,
+                                        horizon TINYINT NOT NULL,
+                                        forecast DOUBLE, lower DOUBLE, upper DOUBLE,
+                                        PRIMARY KEY (level, measure, state_id, district_id, years, Quarter))"""
+
+
+def design_matrix(periods):
+    # periods: absolute quarter numbers (years * 4 + Quarter - 1)
+    t = np.asarray(periods, dtype='float64')
+    quarter = np.asarray(periods) % 4
+    return np.column_stack([np.ones_like(t), t - t[0] if len(t) else t,
+                            quarter == 1, quarter == 2, quarter == 3]).astype('float64')
+
+
+def fit(values, periods, horizon=HORIZON, window=WINDOW):
+    # values: (series x periods) matrix with NaN for missing quarters.
+    # Returns forecast, lower and upper, each (series x horizon); series with
+    # fewer than MIN_OBSERVATIONS quarters in the window get NaN.
+    values = values[:, -window:]
+    periods = np.asarray(periods)[-window:]
+    x = design_matrix(np.concatenate([periods, periods[-1] + 1 + np.arange(horizon)]))
+    x_fit, x_future = x[:len(periods)], x[len(periods):]
+    k = x.shape[1]
+
+    weights = (np.isfinite(values) & (values >= 0)).astype('float64')
+    z = np.log1p(np.where(weights > 0, values, 0))
+
+    # Stacked normal equations; the tiny ridge keeps series with a gap in
+    # one quarter of the year solvable
+    xtwx = np.einsum('tk,st,tl->skl', x_fit, weights, x_fit) + 1e-6 * np.eye(k)
+    xtwz = np.einsum('tk,st->sk', x_fit, weights * z)
+    coefficients = np.linalg.solve(xtwx, xtwz[..., None])[..., 0]
+
+    residuals = (z - coefficients @ x_fit.T) * weights
+    observations = weights.sum(axis=1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / np.maximum(observations - k, 1))
+
+    projected = coefficients @ x_future.T
+    # The band widens with the horizon like a random walk around the trend
+    spread = Z_95 * sigma[:, None] * np.sqrt(1 + np.arange(horizon))[None, :]
+    forecast = np.expm1(projected)
+    lower = np.maximum(np.expm1(projected - spread), 0)
+    upper = np.expm1(projected + spread)
+
+    too_short = observations < MIN_OBSERVATIONS
+    for result in (forecast, lower, upper):
+        result[too_short] = np.nan
+    return forecast, lower, upper
+
+
+def series_matrix(df, keys, column):
+    # One row per series (keys), one column per quarter from the first to
+    # the last quarter in df; quarters a series is missing stay NaN
+    period = df['years'].astype('int64') * 4 + df['Quarter'].astype('int64') - 1
+    totals = df.assign(period=period).groupby(keys + ['period'])[column].sum()
+    matrix = totals.unstack('period')
+    periods = np.arange(period.min(), period.max() + 1)
+    matrix = matrix.reindex(columns=periods)
+    return matrix.index.to_frame(index=False), matrix.to_numpy(dtype='float64'), periods
+
+
+def build_forecasts(tables, horizon=HORIZON, window=WINDOW):
+    # Forecasts for every measure at state and district level, as stored in
+    # the forecast table
+    frames = []
+    for table, column in FORECAST_MEASURES.values():
+        df = tables[table]
+        for level, keys in [('state', ['state_id']), ('district', ['state_id', 'district_id'])]:
+            series, values, periods = series_matrix(df, keys, column)
+            forecast, lower, upper = fit(values, periods, horizon, window)
+            future = periods[-1] + 1 + np.arange(horizon)
+            n = len(series)
+            frame = pd.DataFrame({
+                'level': level,
+                'measure': column,
+                'state_id': np.repeat(series['state_id'].to_numpy(), horizon),
+                'district_id': np.repeat(series['district_id'].to_numpy(), horizon) if level == 'district' else 0,
+                'years': np.tile(future // 4, n),
+                'Quarter': np.tile(future % 4 + 1, n),
+                'horizon': np.tile(np.arange(1, horizon + 1), n),
+                'forecast': forecast.ravel(),
+                'lower': lower.ravel(),
+                'upper': upper.ravel(),
+            })
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True).astype(
+        {'state_id': 'int16', 'district_id': 'int16', 'years': 'int16', 'Quarter': 'int8', 'horizon': 'int8'})
@@ -0,0 +1,217 @@
+import os
+import re
+import json
+import argparse
+import tempfile
+import functools
+import urllib.request
+import numpy as np
+
+# Pre-built geometry lives under Streamlit's static folder so the browser
+# fetches each file once (and caches it) instead of receiving the GeoJSON
+# inside every figure. Needs server.enableStaticServing (.streamlit/config.toml).
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+GEO_DIR = os.path.join(STATIC_DIR, 'geo')
+GEO_URL = 'app/static/geo'
+
+# State boundaries used when none are given: the GeoJSON most Pulse
+# dashboards use (state name in ST_NM), pinned to one gist revision so a
+# rebuild always gives the same files. Downloaded rather than bundled, since
+# it comes without a licence.
+STATES_URL = ('https://gist.githubusercontent.com/jbrobst/56c13bbbf9d97d187fea01ca62ea5112/raw/'
+              'e388c4cae20aa53cb5090210a42ebb9b765c0a36/india_states.geojson')
+
+# Douglas-Peucker tolerance (degrees) per zoom level: the whole of India
+# needs far less detail than a single state
+ZOOM_TOLERANCES = {'country': 0.02, 'state': 0.003}
+
+# Coordinates are rounded to this many decimals (~100 m), which roughly
+# halves the file size on top of simplification
+COORDINATE_DECIMALS = 3
+
+
+def name_key(name):
+    # Join key for names that are spelled differently in Pulse and in the
+    # boundary files: "Andaman & Nicobar Islands" == "Andaman and Nicobar"
+    name = name.lower().replace('&', ' and ')
+    name = re.sub(r'\b(islands?|district)\b', ' ', name)
+    return re.sub(r'[^a-z0-9]+', '', name)
+
+def district_feature_id(state, district):
+    return f"{name_key(state)}/{name_key(district)}"
+
+
+# Geometry simplification
+
+def simplify_ring(points, tolerance):
+    # Douglas-Peucker on one closed ring (first point == last point)
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        segment = points[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            distances = np.hypot(*(segment - a).T)
+        else:
+            distances = np.abs(ab[0] * (segment[:, 1] - a[1]) - ab[1] * (segment[:, 0] - a[0])) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            index = start + 1 + i
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    ring = points[keep]
+    if len(ring) < 4:
+        return None
+    return ring
+
+def _simplify_polygon(polygon, tolerance):
+    rings = []
+    for position, ring in enumerate(polygon):
+        points = np.asarray(ring, dtype='float64')
+        simplified = simplify_ring(points, tolerance)
+        if simplified is None:
+            if position > 0:
+                continue            # holes that collapse are dropped
+            # keep a coarse outline rather than losing the polygon
+            simplified = points[[0, len(points) // 3, 2 * len(points) // 3, 0]]
+        rings.append(np.round(simplified, COORDINATE_DECIMALS).tolist())
+    return rings
+
+def simplify_geometry(geometry, tolerance):
+    if geometry['type'] == 'Polygon':
+        coordinates = _simplify_polygon(geometry['coordinates'], tolerance)
+    elif geometry['type'] == 'MultiPolygon':
+        coordinates = [_simplify_polygon(polygon, tolerance) for polygon in geometry['coordinates']]
+    else:
+        raise ValueError(f"unsupported geometry type {geometry['type']}")
+    return {'type': geometry['type'], 'coordinates': coordinates}
+
+
+def _write_geojson(path, features):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as geojson:
+        json.dump({'type': 'FeatureCollection', 'features': features}, geojson, separators=(',', ':'))
+
+
+def build(states_path, districts_path=None, state_property='ST_NM', district_property='DISTRICT',
+          output=GEO_DIR):
+    # Run once when the boundary files change. Feature ids are the join keys
+    # used by the dashboard, so no name matching happens at render time.
+    # Without districts_path only the state maps are built.
+    with open(states_path) as source:
+        states = json.load(source)['features']
+    features = [{'type': 'Feature',
+                 'id': name_key(feature['properties'][state_property]),
+                 'properties': {'name': feature['properties'][state_property]},
+                 'geometry': simplify_geometry(feature['geometry'], ZOOM_TOLERANCES['country'])}
+                for feature in states]
+    _write_geojson(os.path.join(output, "states_country.geojson"), features)
+    if districts_path is None:
+        return
+
+    with open(districts_path) as source:
+        districts = json.load(source)['features']
+    by_state = {}
+    country = []
+    for feature in districts:
+        state = feature['properties'][state_property]
+        district = feature['properties'][district_property]
+        properties = {'name': district, 'state': state}
+        country.append({'type': 'Feature', 'id': district_feature_id(state, district), 'properties': properties,
+                        'geometry': simplify_geometry(feature['geometry'], ZOOM_TOLERANCES['country'])})
+        by_state.setdefault(name_key(state), []).append(
+            {'type': 'Feature', 'id': district_feature_id(state, district), 'properties': properties,
+             'geometry': simplify_geometry(feature['geometry'], ZOOM_TOLERANCES['state'])})
+    _write_geojson(os.path.join(output, "districts_country.geojson"), country)
+    for state, features in by_state.items():
+        _write_geojson(os.path.join(output, 'districts', f"{state}.geojson"), features)
+
+
+def download_states(url=STATES_URL):
+    # Path of a temporary copy of the state boundaries
+    with urllib.request.urlopen(url, timeout=60) as response, \
+            tempfile.NamedTemporaryFile('wb', suffix='.geojson', delete=False) as copy:
+        copy.write(response.read())
+    return copy.name
+
+
+# Used by the dashboard
+
+def geometry_file(level, state=None):
+    # Relative path under GEO_DIR for a view: states of India, districts of
+    # India, or (zoomed in) the districts of one state
+    if level == 'state':
+        return "states_country.geojson"
+    if state is None:
+        return "districts_country.geojson"
+    return f"districts/{name_key(state)}.geojson"
+
+def geometry_url(level, state=None):
+    return f"{GEO_URL}/{geometry_file(level, state)}"
+
+@functools.lru_cache(maxsize=64)
+def load_geometry(level, state=None):
+    # Parsed once per process; used when the GeoJSON has to be embedded
+    with open(os.path.join(GEO_DIR, geometry_file(level, state))) as geojson:
+        return json.load(geojson)
+
+@functools.lru_cache(maxsize=64)
+def feature_ids(level, state=None):
+    return frozenset(feature['id'] for feature in load_geometry(level, state)['features'])
+
+def geometry_available(level, state=None):
+    return os.path.exists(os.path.join(GEO_DIR, geometry_file(level, state)))
+
+
+def unmatched(df, level, state=None):
+    # Names in df with no boundary, e.g. districts created after the
+    # boundary file was published
+    ids = feature_ids(level, state)
+    if level == 'state':
+        return sorted({name for name in df['States'] if name_key(name) not in ids})
+    return sorted({district for state_name, district in zip(df['States'], df['district_name'])
+                   if district_feature_id(state_name, district) not in ids})
+
+
+def choropleth(df, level, value, state=None, inline=False, **kwargs):
+    # Plotly choropleth of df (States[, district_name], value). By default the
+    # figure only carries a URL to the pre-built geometry.
+    import plotly.express as px
+
+    df = df.copy()
+    if level == 'state':
+        df['feature_id'] = df['States'].map(name_key)
+    else:
+        df['feature_id'] = [district_feature_id(s, d) for s, d in zip(df['States'], df['district_name'])]
+    geojson = load_geometry(level, state) if inline else geometry_url(level, state)
+    fig = px.choropleth(df, geojson=geojson, locations='feature_id', featureidkey='id', color=value,
+                        hover_name='district_name' if level == 'district' else 'States', **kwargs)
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(margin={'l': 0, 'r': 0, 't': 40, 'b': 0})
+    return fig
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-simplify India boundaries for the map views')
+    parser.add_argument('states', nargs='?',
+                        help=f'GeoJSON of Indian states (default: download {STATES_URL})')
+    parser.add_argument('districts', nargs='?', help='GeoJSON of Indian districts (default: no district maps)')
+    parser.add_argument('--state-property', default='ST_NM', help='feature property with the state name')
+    parser.add_argument('--district-property', default='DISTRICT', help='feature property with the district name')
+    args = parser.parse_args()
+    states = args.states or download_states()
+    try:
+        build(states, args.districts, args.state_property, args.district_property)
+    finally:
+        if not args.states:
+            os.remove(states)
@@ -0,0 +1,16 @@
+import re
+from datetime import datetime
+
+# Names shared by the files and versions the ETL, exports, downloads and the
+# profiler write, so they all look alike and sort in time order
+
+
+def slug(text):
+    # "Trend Analysis Over Time" -> "Trend_Analysis_Over_Time", safe in paths
+    return re.sub(r'[^A-Za-z0-9]+', '_', str(text)).strip('_')
+
+
+def version_stamp(now=None):
+    # Microsecond timestamp, e.g. 20241019T101500123456: unique per load and
+    # ordered as text
+    return (now or datetime.now()).strftime('%Y%m%dT%H%M%S%f')
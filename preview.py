@@ -0,0 +1,119 @@
+import os
+import io
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pymysql
+
+from queries import get_connection, get_years, QUERY_FUNCTIONS
+
+# Progressive rendering of the heaviest views (state-wide joins and
+# district-by-quarter trends). The ETL stores a preview of each of them in
+# view_preview: the view's result as of that load, summed to the grain its
+# chart draws when it has a coarser one. Rows are never sampled: the charts
+# sum and average them, so a sample would shrink the bars. The dashboard starts the exact
+# query in the background, draws the preview (labelled with its age) while
+# it runs, and swaps the exact chart in when it arrives. Previews over
+# PREVIEW_ROWS rows aren't stored, and those older than PREVIEW_MAX_AGE
+# seconds are never shown.
+PREVIEW_ROWS = 50000
+PREVIEW_MAX_AGE = int(os.environ.get('PHONEPE_PREVIEW_MAX_AGE', 7 * 24 * 3600))
+
+# Exact results that arrive within this many seconds (cache hits, small
+# results) are drawn directly, without flashing a preview first
+PREVIEW_AFTER = 0.3
+
+# (query function, query_type) -> (fact table whose years the view is also
+# previewed for, or None when the view takes no year; grain of its chart, or
+# None when the chart draws every row). A grain is (keys, summed columns,
+# averaged): the preview stores the columns summed per key. When the chart
+# also averages the rows (a seaborn line), averaged is True and the number
+# of rows per key is stored too; load() spreads each sum evenly back over
+# that many rows, which keeps both the sums and the mean line of the chart.
+PREVIEW_VIEWS = {
+    ('get_transaction_analysis', 'Comparative Analysis'): (None, None),
+    ('get_user_registration_analysis', 'Comparative Analysis'): (
+        None, (['States', 'district_name'], ['total_registered_users'], False)),
+    ('get_user_growth_analysis', 'Performance Comparison'): (None, None),
+    ('get_user_growth_analysis', 'Trend Analysis Over Time'): (
+        'map_user', (['States', 'years', 'Quarter'], ['total_user', 'total_appopens'], True)),
+}
+
+# Column of a stored preview holding the number of rows summed per key
+GROUP_ROWS = '_rows'
+
+PREVIEW_DDL = """CREATE TABLE view_preview(view_name VARCHAR(64) NOT NULL,
+                                           query_type VARCHAR(128) NOT NULL,
+                                           years SMALLINT NOT NULL,
+                                           created_at DATETIME NOT NULL,
+                                           preview_rows INT NOT NULL,
+                                           total_rows INT NOT NULL,
+                                           data LONGTEXT NOT NULL,
+                                           PRIMARY KEY (view_name, query_type, years))"""
+
+# Exact queries of all dashboard sessions in this process
+EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='exact-query')
+
+
+def summarise(df, grain, rows=PREVIEW_ROWS):
+    # The preview of a view result, or None when it is still too large
+    if grain is not None:
+        keys, sums, averaged = grain
+        groups = df.groupby(keys, sort=False, dropna=False)
+        summary = groups[sums].sum()
+        if averaged:
+            summary[GROUP_ROWS] = groups.size()
+        df = summary.reset_index()
+    return df if len(df) <= rows else None
+
+
+def spread(summary, grain):
+    # Back from a stored preview to rows the chart can draw
+    if grain is None or not grain[2]:
+        return summary
+    _, sums, _ = grain
+    counts = summary.pop(GROUP_ROWS)
+    summary[sums] = summary[sums].div(counts, axis=0)
+    return summary.loc[summary.index.repeat(counts)].reset_index(drop=True)
+
+
+def build_previews():
+    # One row per previewed view and year (0 = all years), as stored in
+    # view_preview. Runs the exact SQL, so call it after the tables are loaded.
+    created = datetime.now().replace(microsecond=0)
+    rows = []
+    for (function, query_type), (year_table, grain) in PREVIEW_VIEWS.items():
+        years = [None] + (get_years(year_table) if year_table else [])
+        for year in years:
+            params = {'year': year} if year_table else {}
+            df = QUERY_FUNCTIONS[function].run_sql(query_type, **params)
+            summary = summarise(df, grain)
+            if summary is not None:
+                rows.append((function, query_type, int(year or 0), created, len(summary), len(df),
+                             summary.to_json(orient='split', index=False)))
+    return pd.DataFrame(rows, columns=['view_name', 'query_type', 'years', 'created_at',
+                                       'preview_rows', 'total_rows', 'data'])
+
+
+def load(function, query_type, year=None, max_age=PREVIEW_MAX_AGE):
+    # The stored preview of a view, or None when there is none or it is too old
+    oldest = datetime.now() - timedelta(seconds=max_age)
+    conn = get_connection()
+    try:
+        with conn.cursor() as mycursor:
+            mycursor.execute("""SELECT created_at, preview_rows, total_rows, data FROM view_preview
+                                WHERE view_name = %s AND query_type = %s AND years = %s AND created_at >= %s""",
+                             (function, query_type, int(year or 0), oldest))
+            row = mycursor.fetchone()
+    except pymysql.err.ProgrammingError:
+        # Loaded before previews existed, or being rebuilt by the ETL
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    created, preview_rows, total_rows, data = row
+    _, grain = PREVIEW_VIEWS[(function, query_type)]
+    df = spread(pd.read_json(io.StringIO(data), orient='split'), grain)
+    return {'df': df, 'created': created,
+            'rows': preview_rows, 'total_rows': total_rows}
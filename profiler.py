@@ -0,0 +1,192 @@
+import os
+import sys
+import hmac
+import json
+import time
+import functools
+import threading
+from collections import Counter
+
+from naming import slug, version_stamp
+
+# Where captures are written, and the token that enables them. Without a
+# token profiling can't be switched on at all.
+PROFILE_DIR = os.environ.get('PHONEPE_PROFILE_DIR', 'profiles')
+PROFILE_TOKEN = os.environ.get('PHONEPE_PROFILE_TOKEN')
+
+# 200 samples/s is plenty for reruns that take from tenths of a second to a
+# few seconds, and keeps the sampler's own cost to a few percent
+INTERVAL = 0.005
+
+# Most reruns one ?runs= can arm, so a typo can't profile a session forever
+MAX_RUNS = 20
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    # Samples the Python stacks of some threads from a background thread
+    # every interval seconds. The profiled threads run untouched: no tracing
+    # hook, so the cost doesn't depend on how many calls they make. Threads
+    # that work for the profiled one (e.g. a query run in a pool) can be
+    # added while they do; their stacks start at their own thread's root.
+
+    def __init__(self, thread_id=None, interval=INTERVAL):
+        self.thread_ids = {thread_id or threading.get_ident()}
+        self.interval = interval
+        self.stacks = Counter()
+        self.files = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._guard = threading.Lock()
+
+    # The set is replaced, never changed in place, so the sampler can
+    # iterate it without a lock
+    def add_thread(self, thread_id=None):
+        with self._guard:
+            self.thread_ids = self.thread_ids | {thread_id or threading.get_ident()}
+
+    def remove_thread(self, thread_id=None):
+        with self._guard:
+            self.thread_ids = self.thread_ids - {thread_id or threading.get_ident()}
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    name = _frame_name(frame)
+                    self.files.setdefault(name, (frame.f_code.co_filename, frame.f_code.co_firstlineno))
+                    stack.append(name)
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self.stacks
+
+
+def collapsed(stacks):
+    # Brendan Gregg's folded format, for flamegraph.pl / speedscope / inferno
+    return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+
+def speedscope(profiler, name):
+    frames = {}
+    samples, weights = [], []
+    for stack, count in profiler.stacks.most_common():
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(count * profiler.interval * 1000)
+    shared = [{'name': frame, 'file': profiler.files[frame][0], 'line': profiler.files[frame][1]}
+              for frame in frames]
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'phonepe profiler.py',
+        'shared': {'frames': shared},
+        'profiles': [{'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+                      'startValue': 0, 'endValue': sum(weights),
+                      'samples': samples, 'weights': weights}],
+    }
+
+
+
+
+def save(profiler, tags, directory=PROFILE_DIR):
+    # <time>__<section>__<query_type>.collapsed and .speedscope.json
+    os.makedirs(directory, exist_ok=True)
+    name = '__'.join([version_stamp()]
+                     + [slug(tags[tag]) for tag in ('section', 'query_type') if tags.get(tag)])
+    base = os.path.join(directory, name)
+    with open(base + '.collapsed', 'w') as output:
+        output.write(collapsed(profiler.stacks))
+    title = ' / '.join(str(value) for value in tags.values() if value) or 'rerun'
+    with open(base + '.speedscope.json', 'w') as output:
+        json.dump(speedscope(profiler, f"{title} ({profiler.elapsed * 1000:.0f} ms)"), output)
+    return base
+
+
+# Streamlit session glue. ?profile=<PHONEPE_PROFILE_TOKEN>&runs=N arms the
+# next N reruns of that browser session; the parameters are removed again
+# so a reload doesn't re-arm it. When nothing is armed, begin() is a
+# dictionary lookup.
+
+def _armed(query_params):
+    # Constant-time comparison, so the token can't be guessed byte by byte
+    # from response times
+    given = query_params.get('profile')
+    return bool(PROFILE_TOKEN) and given is not None and hmac.compare_digest(
+        given.encode(), PROFILE_TOKEN.encode())
+
+def _runs(value):
+    # ?runs= as typed into the address bar: anything but a whole number
+    # profiles one rerun, and larger counts are capped at MAX_RUNS
+    try:
+        runs = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return min(max(runs, 1), MAX_RUNS)
+
+def begin(query_params, session_state):
+    capture = session_state.get('profile_capture')
+    if capture is not None:
+        # The previous rerun was interrupted (st.rerun, widget change)
+        # before end(); drop its partial profile
+        capture['profiler'].stop()
+        session_state['profile_capture'] = None
+
+    if _armed(query_params):
+        session_state['profile_runs'] = _runs(query_params.get('runs', 1))
+        del query_params['profile']
+        if 'runs' in query_params:
+            del query_params['runs']
+
+    if not session_state.get('profile_runs'):
+        return
+    session_state['profile_runs'] -= 1
+    session_state['profile_capture'] = {'profiler': SamplingProfiler().start(), 'tags': {}}
+
+def tag(session_state, **tags):
+    capture = session_state.get('profile_capture')
+    if capture is not None:
+        capture['tags'].update(tags)
+
+def follow(session_state, func):
+    # func, to be run on another thread for this session (e.g. a query in a
+    # thread pool): while the session is profiled, that thread is sampled
+    # too for as long as func runs
+    capture = session_state.get('profile_capture')
+    if capture is None:
+        return func
+    sampler = capture['profiler']
+
+    @functools.wraps(func)
+    def followed(*args, **kwargs):
+        sampler.add_thread()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.remove_thread()
+    return followed
+
+def end(session_state):
+    capture = session_state.get('profile_capture')
+    if capture is None:
+        return None
+    session_state['profile_capture'] = None
+    capture['profiler'].stop()
+    return save(capture['profiler'], capture['tags'])
@@ -0,0 +1,763 @@
+import os
+import functools
+import pymysql
+from pymysql.constants import FIELD_TYPE
+import pandas as pd
+
+from forecast import FORECAST_MEASURES
+
+# When set, views are served from the Arrow snapshot the ETL publishes there
+# instead of querying MySQL (see snapshot.py)
+SNAPSHOT_DIR = os.environ.get('PHONEPE_SNAPSHOT_DIR')
+
+# When set, view results are cached there and shared by every dashboard
+# process on the host (see result_cache.py)
+CACHE_DIR = os.environ.get('PHONEPE_CACHE_DIR')
+
+def _current_snapshot():
+    if not SNAPSHOT_DIR:
+        return None
+    # pyarrow is only needed when running from a snapshot
+    from snapshot import current_snapshot
+    return current_snapshot(SNAPSHOT_DIR)
+
+_result_cache = None
+
+def _shared_cache():
+    global _result_cache
+    if not CACHE_DIR:
+        return None
+    if _result_cache is None:
+        from result_cache import ResultCache, DiskStore
+        _result_cache = ResultCache(DiskStore(CACHE_DIR), get_dataset_version)
+    return _result_cache
+
+def read_sql(query, params=None):
+    conn = get_connection()
+    try:
+        return pd.read_sql(query, conn, params=params)
+    finally:
+        conn.close()
+
+def read_sql_chunks(query, params=None, chunk_rows=50000):
+    # Rows come from a server-side cursor (SSCursor), so neither pymysql nor
+    # pandas ever holds more than one chunk. Column dtypes come from the
+    # result metadata so that every chunk has the same schema. An empty
+    # result is one empty chunk, so exports still get its columns.
+    conn = get_connection()
+    try:
+        with conn.cursor(pymysql.cursors.SSCursor) as cursor:
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            dtypes = {column[0]: _column_dtype(column[1]) for column in cursor.description}
+            rows = cursor.fetchmany(chunk_rows)
+            while True:
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True).astype(dtypes)
+                rows = cursor.fetchmany(chunk_rows)
+                if not rows:
+                    break
+    finally:
+        conn.close()
+
+_INTEGER_TYPES = {FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.INT24, FIELD_TYPE.LONG,
+                  FIELD_TYPE.LONGLONG, FIELD_TYPE.YEAR}
+_FLOAT_TYPES = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL, FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE}
+
+def _column_dtype(type_code):
+    if type_code in _INTEGER_TYPES:
+        return 'Int64'
+    if type_code in _FLOAT_TYPES:
+        return 'float64'
+    return 'string'
+
+def dashboard_view(func):
+    # func builds a view's SQL and returns (query, params). The decorated
+    # function returns the view's result: from the current snapshot when
+    # there is one, else through the shared result cache when configured,
+    # else straight from MySQL. .run_sql always runs the SQL and .sql only
+    # builds it (for streaming exports).
+    def run_sql(query_type, **kwargs):
+        return read_sql(*func(query_type, **kwargs))
+
+    @functools.wraps(func)
+    def wrapper(query_type, **kwargs):
+        snapshot = _current_snapshot()
+        if snapshot is not None:
+            return snapshot.view(func.__name__, query_type, **kwargs)
+        cache = _shared_cache()
+        if cache is not None:
+            return cache.get_or_compute([func.__name__, query_type, sorted(kwargs.items())],
+                                        lambda: run_sql(query_type, **kwargs))
+        return run_sql(query_type, **kwargs)
+    wrapper.run_sql = run_sql
+    wrapper.sql = func
+    return wrapper
+
+def stream_view(name, query_type, chunk_rows=50000, **kwargs):
+    # A view's result as DataFrame chunks, for exports that must not build
+    # the whole result in memory: batches of the snapshot file, or rows from
+    # a MySQL server-side cursor
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return snapshot.view_chunks(name, query_type, chunk_rows, **kwargs)
+    return read_sql_chunks(*QUERY_FUNCTIONS[name].sql(query_type, **kwargs), chunk_rows=chunk_rows)
+
+# Database connection (MySQL)
+def get_connection():
+    mydb_conn = pymysql.connect(
+     host = 'localhost',
+     user = 'root',
+     password = 'root',
+     database = 'phonepe_transactions'
+    )
+    return mydb_conn
+
+# Stamp written by etl.py after every load; cached results are keyed by it
+def get_dataset_version():
+    conn = get_connection()
+    try:
+        with conn.cursor() as mycursor:
+            mycursor.execute("SELECT version FROM dataset_version")
+            row = mycursor.fetchone()
+    except pymysql.err.ProgrammingError:
+        # Loaded before dataset_version existed: don't cache
+        row = None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+# Years present in a fact table, for the year selectors
+def get_years(table):
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return snapshot.years(table)
+    df = read_sql(f"SELECT DISTINCT years FROM {table} ORDER BY years")
+    return df['years'].tolist()
+
+# State names, for the state selectors
+def get_states():
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        return sorted(snapshot.table('dim_state')['state_name'].to_pylist())
+    df = read_sql("SELECT state_name FROM dim_state ORDER BY state_name")
+    return df['state_name'].tolist()
+
+# The drill-down cube built by the ETL, loaded once per snapshot or dataset
+# version; its slices are then cached in memory by the Cube itself
+_cubes = {}
+
+def get_cube():
+    from cube import Cube
+
+    snapshot = _current_snapshot()
+    version = ('snapshot', snapshot.version) if snapshot is not None else ('mysql', get_dataset_version())
+    if version not in _cubes:
+        if snapshot is not None:
+            cells = snapshot.table('olap_cube').to_pandas()
+        else:
+            cells = read_sql("SELECT * FROM olap_cube")
+        _cubes.clear()
+        _cubes[version] = Cube(cells)
+    return _cubes[version]
+
+# Filter on years in SQL so partitioned tables only read that year's partition
+def year_filter(year, column='years'):
+    return f"WHERE {column} = %(year)s" if year is not None else ""
+
+# Query functions
+@dashboard_view
+def get_decoding_transaction_dynamics(query_type, year=None):
+    if query_type == 'Regional Performance Analysis':
+        query = """
+                    WITH yearlyRegionalPerformance AS (
+            SELECT
+                state_id,
+                years,
+                SUM(Transaction_amount) AS total_transaction_amount
+            FROM
+                aggregated_transaction
+            GROUP BY
+                state_id, years
+        ),
+
+        RankedRegions AS (
+            SELECT
+                state_id,
+                years,
+                total_transaction_amount,
+                RANK() OVER (PARTITION BY years ORDER BY total_transaction_amount ASC) AS `rank`
+            FROM
+                yearlyRegionalPerformance
+        )
+
+        SELECT
+            dim_state.state_name AS States,
+            years,
+            total_transaction_amount,
+            `rank`
+        FROM
+            RankedRegions
+        JOIN dim_state USING (state_id)
+        WHERE
+            `rank` <= 5
+        ORDER BY 
+            years, `rank`;
+        """
+    elif query_type == 'Category Insights':
+        query = """
+            SELECT Transaction_type,
+            SUM(Transaction_count) AS total_volume, 
+            SUM(Transaction_amount) AS total_revenue,
+            SUM(Transaction_amount) / SUM(Transaction_count) AS revenue_per_transaction
+            FROM 
+                aggregated_transaction
+            GROUP BY 
+                Transaction_type
+            Order by
+            total_volume DESC;
+        """
+    elif query_type == 'Trend Analysis':
+        query = f"""
+            SELECT years, Quarter, Transaction_type,
+            SUM(Transaction_count) AS total_volume,
+			SUM(Transaction_amount) AS total_revenue
+            FROM aggregated_transaction
+            {year_filter(year)}
+            GROUP BY years, Quarter,Transaction_type
+            ORDER BY 
+			years, quarter
+        """
+    elif query_type == 'Investigate Interdependencies':
+        query = """
+            SELECT
+            dim_state.state_name AS States,
+            years,
+            Quarter,
+            Transaction_amount,
+            LAG(Transaction_amount) OVER (PARTITION BY state_id ORDER BY years, Quarter) AS previous_Transaction_amount,
+            ((Transaction_amount - LAG(Transaction_amount) OVER (PARTITION BY state_id ORDER BY years, Quarter))
+            / LAG(Transaction_amount) OVER (PARTITION BY state_id ORDER BY years, Quarter)) * 100 AS Growth_percentage
+        FROM
+            aggregated_transaction
+        JOIN dim_state USING (state_id)
+        ORDER BY
+            States, years, Quarter;
+        """
+    
+    return query, {'year': year}
+
+@dashboard_view
+def get_transaction_analysis(query_type):
+    if query_type == 'Identifying Top States':
+        query = """
+          SELECT
+            dim_state.state_name AS States,
+            Total_Transaction_Value
+        FROM (
+            SELECT state_id, SUM(Transaction_amount) AS Total_Transaction_Value
+            FROM
+                top_transaction_district
+            GROUP BY
+                state_id
+            ORDER BY
+                Total_Transaction_Value DESC
+            LIMIT 10
+        ) AS top_states
+        JOIN dim_state USING (state_id)
+        ORDER BY
+            Total_Transaction_Value DESC;
+        """
+    elif query_type == 'District Performance Evaluation':
+        query = """
+           SELECT
+            dim_state.state_name AS States, dim_district.district_name,
+            Total_Transactions,
+            Total_Transaction_Value
+        FROM (
+            SELECT state_id, district_id,
+                SUM(Transaction_count) AS Total_Transactions,
+                SUM(Transaction_amount) AS Total_Transaction_Value
+            FROM
+                top_transaction_district
+            GROUP BY
+                state_id, district_id
+            ORDER BY
+                Total_Transaction_Value DESC,
+                Total_Transactions DESC
+            LIMIT 10
+        ) AS top_districts
+        JOIN dim_state USING (state_id)
+        JOIN dim_district USING (district_id)
+        ORDER BY
+            Total_Transaction_Value DESC,
+            Total_Transactions DESC;
+        """
+    elif query_type == 'Pin Code Insights':
+        query = """
+            SELECT dim_state.state_name AS States,
+            pincode,
+            Total_Transactions,
+            Total_Transaction_Value
+        FROM (
+            SELECT state_id, pincode,
+                SUM(Transaction_count) AS Total_Transactions,
+                SUM(Transaction_amount) AS Total_Transaction_Value
+            FROM
+                top_transaction_pincode
+            GROUP BY
+                state_id, pincode
+            ORDER BY
+                Total_Transactions DESC,
+                Total_Transaction_Value DESC
+            LIMIT 10
+        ) AS top_pincodes
+        JOIN dim_state USING (state_id)
+        ORDER BY
+            Total_Transactions DESC,
+            Total_Transaction_Value DESC;
+        """
+
+    elif query_type == 'Comparative Analysis':
+        query = """
+                    WITH Total_Transaction AS (
+                SELECT SUM(Transaction_amount) AS total_value
+                FROM top_transaction_district
+            ),
+            Comparison AS (
+            SELECT
+                top_transaction_district.state_id,
+                top_transaction_district.district_id,
+                top_transaction_district.years,
+                top_transaction_pincode.pincode,
+                COUNT(top_transaction_district.Transaction_count) AS Total_Transactions,
+                SUM(top_transaction_district.Transaction_amount) AS Total_Transaction_Value,
+                (SUM(top_transaction_district.Transaction_amount) / (SELECT total_value FROM Total_Transaction)) * 100 AS Percentage_Share,
+                AVG(top_transaction_district.Transaction_amount) AS Avg_Transaction_Value
+            FROM
+                top_transaction_district
+            JOIN
+                top_transaction_pincode
+                ON top_transaction_district.state_id = top_transaction_pincode.state_id
+            GROUP BY
+                top_transaction_district.state_id,
+                top_transaction_district.district_id,
+                 top_transaction_district.years,
+                top_transaction_pincode.pincode
+            ORDER BY
+                Total_Transaction_Value DESC
+                LIMIT 50
+            )
+            SELECT
+                dim_state.state_name AS States,
+                dim_district.district_name,
+                years,
+                pincode,
+                Total_Transactions,
+                Total_Transaction_Value,
+                Percentage_Share,
+                Avg_Transaction_Value
+            FROM Comparison
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            ORDER BY
+                Total_Transaction_Value DESC;
+                    """
+    
+    return query, None
+
+
+@dashboard_view
+def get_transaction_market_analysis(query_type):
+    if query_type == 'Transaction Volume and Value Analysis':
+        query = """
+           SELECT dim_state.state_name AS States, total_no_transaction, total_value_transaction
+            from (
+                SELECT state_id, SUM(Transaction_count) As total_no_transaction,
+                SUM(Transaction_amount) As total_value_transaction
+                from map_transaction
+                GROUP by state_id
+            ) AS state_totals
+            JOIN dim_state USING (state_id)
+
+        """
+    elif query_type == 'Performance Comparison':
+        query = """
+            SELECT dim_state.state_name AS States,
+            SUM(Transaction_count) AS total_transaction_count,
+            SUM(Transaction_amount) AS total_transaction_value,
+            (SUM(Transaction_count) / (SELECT SUM(Transaction_count) FROM map_transaction)) * 100 AS pct_transaction_count,
+            (SUM(Transaction_amount) / (SELECT SUM(Transaction_amount) FROM map_transaction)) * 100 AS pct_transaction_value,
+
+        CASE
+                WHEN (SUM(Transaction_count) / (SELECT SUM(Transaction_count) FROM map_transaction)) * 100 > 10 
+                    OR (SUM(Transaction_amount) / (SELECT SUM(Transaction_amount) FROM map_transaction)) * 100 > 10 THEN 'Strong Performance'
+                WHEN (SUM(Transaction_count) / (SELECT SUM(Transaction_count) FROM map_transaction)) * 100 < 2 
+                    AND (SUM(Transaction_amount) / (SELECT SUM(Transaction_amount) FROM map_transaction)) * 100 < 2 THEN 'Underperformance'
+                ELSE 'Average Performance'
+            END AS performance_category
+        FROM
+            map_transaction
+        JOIN dim_state USING (state_id)
+        GROUP BY
+            state_id, dim_state.state_name
+        ORDER BY
+            pct_transaction_count DESC,
+            pct_transaction_value DESC;
+        """
+
+    elif query_type == 'District-Level Insights':
+        query = """
+            SELECT dim_state.state_name AS States, dim_district.district_name, total_revenue, total_count
+            from (
+                SELECT state_id, district_id, SUM(Transaction_amount) as total_revenue, SUM(Transaction_count) as total_count
+                from map_transaction
+                group by state_id, district_id
+            ) AS district_totals
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            order by States , total_revenue DESC
+            LIMIT 50;
+
+        """
+    elif query_type == 'Trends Over Time':
+        query = """
+            SELECT dim_state.state_name AS States, years, Quarter, total_revenue, avg_revenue
+            FROM (
+                SELECT state_id, years, Quarter, SUM(Transaction_amount) as total_revenue, AVG(Transaction_amount) as avg_revenue
+                FROM
+                    map_transaction
+                GROUP BY
+                    state_id, years, Quarter
+            ) AS quarterly
+            JOIN dim_state USING (state_id)
+            ORDER BY
+                States, years, Quarter
+        """
+
+    elif query_type == 'Market Potential and Strategy Development':
+        query = """
+            SELECT
+                dim_state.state_name AS States,
+                total_transactions,
+                total_revenue,
+                avg_transaction_value
+            FROM (
+                SELECT
+                    state_id,
+                    SUM(Transaction_count) AS total_transactions,
+                    SUM(Transaction_amount) AS total_revenue,
+                    SUM(Transaction_amount) / SUM(Transaction_count) AS avg_transaction_value
+                FROM
+                    map_transaction
+                GROUP BY
+                    state_id
+            ) AS state_totals
+            JOIN dim_state USING (state_id)
+            ORDER BY
+                total_transactions DESC, avg_transaction_value ASC;
+        """
+    
+    return query, None
+
+@dashboard_view
+def get_user_growth_analysis(query_type, year=None):
+    if query_type == 'User Engagement Analysis':
+        query = """
+          SELECT dim_state.state_name AS States, dim_district.district_name,
+          total_registered_users, total_users, avg_appopens
+          from (
+              SELECT state_id, district_id, SUM(registered_user) as total_registered_users,
+              COUNT(distinct registered_user) as total_users,avg(appOpens) as avg_appopens
+                 from map_user
+                group by state_id, district_id
+          ) AS district_users
+          JOIN dim_state USING (state_id)
+          JOIN dim_district USING (district_id)
+
+        """
+    elif query_type == 'Performance Comparison':
+        query = """
+            SELECT dim_state.state_name AS States,
+            dim_district.district_name,
+            total_registered_user,
+            total_appopens,
+            total_active_users,
+            avg_user_percentage
+            from (
+                SELECT map_user.state_id,
+                map_user.district_id,
+                SUM(registered_user) as total_registered_user,
+                SUM(appOpens) As total_appopens,
+                SUM(aggregated_user.User_count) As total_active_users,
+                AVG(aggregated_user.user_percentage) AS avg_user_percentage
+                From map_user
+                JOIN aggregated_user
+                ON aggregated_user.state_id = map_user.state_id
+                group by map_user.state_id, map_user.district_id
+            ) AS district_users
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            order by total_active_users DESC
+
+        """
+
+    elif query_type == 'Trend Analysis Over Time':
+        query = f"""
+            SELECT dim_state.state_name AS States, dim_district.district_name, years, Quarter,
+            total_user, total_appopens
+            from (
+                SELECT state_id, district_id, years, Quarter,
+                SUM(registered_user) as total_user,
+                SUM(appOpens) as total_appopens
+                from map_user
+                {year_filter(year)}
+                GROUP BY
+                state_id, district_id, years, Quarter
+            ) AS quarterly
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            ORDER BY
+            years ASC, Quarter ASC, States, district_name;
+        """
+
+    elif query_type == 'Identifying High-Value Markets':
+        query = """
+           SELECT
+            dim_state.state_name AS States,
+            dim_district.district_name,
+            total_registered_user,
+            total_appopens,
+            app_open_ratio
+        FROM (
+            SELECT
+                state_id,
+                district_id,
+                SUM(registered_user) AS total_registered_user,
+                SUM(appOpens) AS total_appopens,
+                CASE
+                    WHEN SUM(registered_user) = 0 THEN 0
+                    ELSE CAST(SUM(appOpens) AS FLOAT) / SUM(registered_user)
+                END AS app_open_ratio
+            FROM map_user
+            GROUP BY state_id, district_id
+        ) AS district_users
+        JOIN dim_state USING (state_id)
+        JOIN dim_district USING (district_id)
+        ORDER BY total_registered_user DESC;
+        """
+    
+    return query, {'year': year}
+
+@dashboard_view
+def get_user_registration_analysis(query_type):
+    if query_type == 'Identifying Top 10 States':
+        query = """
+          SELECT
+            dim_state.state_name AS States,
+            years,
+            quarter,
+            highest_registered_users
+        FROM (
+            SELECT state_id, years, quarter, SUM(registeredUsers) AS highest_registered_users
+            FROM
+                top_user_district
+            GROUP BY
+                state_id, years, quarter
+            ORDER BY
+                highest_registered_users DESC
+            LIMIT 10
+        ) AS top_states
+        JOIN dim_state USING (state_id)
+        ORDER BY
+            highest_registered_users DESC;
+
+        """
+    elif query_type == 'Analyze fluctuations in user registration across different quarters and states':
+        query = """
+          select dim_state.state_name AS States, Quarter, total_registered_users, change_from_previous_quarter
+          from (
+            select state_id,Quarter,SUM(registeredUsers)  AS total_registered_users,
+            SUM(registeredUsers) - LAG(SUM(registeredUsers)) OVER (PARTITION BY state_id ORDER BY quarter) AS change_from_previous_quarter
+            from top_user_district
+            GROUP BY
+                state_id, quarter
+          ) AS quarterly
+          JOIN dim_state USING (state_id)
+            ORDER BY
+                States, quarter;
+        """
+    elif query_type == 'District Performance Evaluation':
+        query = """
+            select dim_state.state_name AS States, dim_district.district_name, registered_users
+            from (
+                select state_id, district_id, SUM(registeredUsers) AS registered_users
+                from top_user_district
+                group by state_id, district_id
+                order by registered_users DESC
+                LIMIT 10
+            ) AS top_districts
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            order by registered_users DESC;
+        """
+
+    elif query_type == 'Pin Code Insights':
+        query = """
+            SELECT dim_state.state_name AS States, pincode, user_registrations
+            FROM (
+                SELECT state_id, pincode, SUM(registeredUsers) AS user_registrations
+                FROM top_user_pincode
+                GROUP BY state_id, pincode
+                ORDER BY user_registrations DESC
+                LIMIT 10
+            ) AS top_pincodes
+            JOIN dim_state USING (state_id)
+            ORDER BY user_registrations DESC;
+
+        """
+
+    elif query_type == 'Comparative Analysis':
+        query = """
+        select dim_state.state_name AS States, dim_district.district_name, pincode, total_registered_users
+        from (
+            select top_user_pincode.state_id, top_user_district.district_id, top_user_pincode.pincode,
+            SUM(top_user_pincode.registeredUsers) As total_registered_users
+            from top_user_district
+            RIGHT JOIN
+            top_user_pincode
+            ON top_user_district.state_id = top_user_pincode.state_id
+            GROUP BY top_user_pincode.state_id, top_user_district.district_id, top_user_pincode.pincode
+        ) AS registrations
+        JOIN dim_state USING (state_id)
+        LEFT JOIN dim_district USING (district_id)
+        ORDER BY total_registered_users DESC;
+        """
+    
+    return query, None
+
+
+# Map views: one metric per state or district, for the choropleths
+MAP_MEASURES = {
+    'Transactions': ('map_transaction', {'total_count': 'SUM(Transaction_count)',
+                                         'total_amount': 'SUM(Transaction_amount)'}),
+    'Registered Users': ('map_user', {'total_registered_users': 'SUM(registered_user)',
+                                      'total_appopens': 'SUM(appOpens)'}),
+    'Insurance': ('map_insurance', {'total_count': 'SUM(Count)',
+                                    'total_amount': 'SUM(amount)'}),
+}
+
+@dashboard_view
+def get_map_analysis(query_type, year=None, state=None):
+    # e.g. 'Registered Users by District'
+    metric, level = query_type.rsplit(' by ', 1)
+    table, measures = MAP_MEASURES[metric]
+    aggregates = ", ".join(f"{expression} AS {name}" for name, expression in measures.items())
+    columns = ", ".join(measures)
+
+    conditions = []
+    if year is not None:
+        conditions.append("years = %(year)s")
+    if state is not None:
+        conditions.append("state_id = (SELECT state_id FROM dim_state WHERE state_name = %(state)s)")
+    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+    if level == 'State':
+        query = f"""
+            SELECT dim_state.state_name AS States, years, {columns}
+            FROM (
+                SELECT state_id, years, {aggregates}
+                FROM {table}
+                {where}
+                GROUP BY state_id, years
+            ) AS totals
+            JOIN dim_state USING (state_id)
+            ORDER BY States, years
+        """
+    else:
+        query = f"""
+            SELECT dim_state.state_name AS States, dim_district.district_name, years, {columns}
+            FROM (
+                SELECT state_id, district_id, years, {aggregates}
+                FROM {table}
+                {where}
+                GROUP BY state_id, district_id, years
+            ) AS totals
+            JOIN dim_state USING (state_id)
+            JOIN dim_district USING (district_id)
+            ORDER BY States, district_name, years
+        """
+
+    return query, {'year': year, 'state': state}
+
+@dashboard_view
+def get_forecast_analysis(query_type, state=None):
+    # e.g. 'App Opens by District': quarterly actuals followed by the next
+    # quarters from the forecast table (fitted by the ETL)
+    measure, level = query_type.rsplit(' by ', 1)
+    table, column = FORECAST_MEASURES[measure]
+    where = "WHERE state_id = (SELECT state_id FROM dim_state WHERE state_name = %(state)s)" if state else ""
+    forecast_where = "WHERE level = %(level)s AND measure = %(measure)s" + (
+        " AND state_id = (SELECT state_id FROM dim_state WHERE state_name = %(state)s)" if state else "")
+
+    if level == 'State':
+        keys, district, join = "state_id", "", ""
+    else:
+        keys = "state_id, district_id"
+        district = "dim_district.district_name, "
+        join = "JOIN dim_district USING (district_id)"
+
+    query = f"""
+        SELECT dim_state.state_name AS States, {district}years, Quarter, value, lower, upper, kind
+        FROM (
+            SELECT {keys}, years, Quarter, SUM({column}) AS value,
+            NULL AS lower, NULL AS upper, 'actual' AS kind
+            FROM {table}
+            {where}
+            GROUP BY {keys}, years, Quarter
+            UNION ALL
+            SELECT {keys}, years, Quarter, forecast AS value, lower, upper, 'forecast' AS kind
+            FROM forecast
+            {forecast_where}
+        ) AS series
+        JOIN dim_state USING (state_id)
+        {join}
+        ORDER BY States, {district}years, Quarter
+    """
+
+    return query, {'state': state, 'level': level.lower(), 'measure': column}
+
+# Every (function, query_type) view the dashboard shows
+QUERY_TYPES = {
+    'get_decoding_transaction_dynamics': [
+        'Regional Performance Analysis', 'Category Insights', 'Trend Analysis',
+        'Investigate Interdependencies'],
+    'get_transaction_analysis': [
+        'Identifying Top States', 'District Performance Evaluation', 'Pin Code Insights',
+        'Comparative Analysis'],
+    'get_transaction_market_analysis': [
+        'Transaction Volume and Value Analysis', 'Performance Comparison', 'District-Level Insights',
+        'Trends Over Time', 'Market Potential and Strategy Development'],
+    'get_user_growth_analysis': [
+        'User Engagement Analysis', 'Performance Comparison', 'Trend Analysis Over Time',
+        'Identifying High-Value Markets'],
+    'get_user_registration_analysis': [
+        'Identifying Top 10 States',
+        'Analyze fluctuations in user registration across different quarters and states',
+        'District Performance Evaluation', 'Pin Code Insights', 'Comparative Analysis'],
+    'get_map_analysis': [
+        'Transactions by State', 'Transactions by District',
+        'Registered Users by State', 'Registered Users by District',
+        'Insurance by State', 'Insurance by District'],
+    'get_forecast_analysis': [f"{measure} by {level}" for measure in FORECAST_MEASURES
+                              for level in ('State', 'District')],
+}
+
+QUERY_FUNCTIONS = {
+    'get_decoding_transaction_dynamics': get_decoding_transaction_dynamics,
+    'get_transaction_analysis': get_transaction_analysis,
+    'get_transaction_market_analysis': get_transaction_market_analysis,
+    'get_user_growth_analysis': get_user_growth_analysis,
+    'get_user_registration_analysis': get_user_registration_analysis,
+    'get_map_analysis': get_map_analysis,
+    'get_forecast_analysis': get_forecast_analysis,
+}
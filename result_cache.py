@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+import pyarrow as pa
+
+# flock is what makes concurrent misses from different processes wait for a
+# single query; without it (Windows) DiskStore's per-key thread locks still
+# coalesce the threads of one process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# View results are stored as Arrow IPC stream bytes
+
+def to_bytes(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def from_bytes(data):
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+class LocalStore:
+    # In-process stand-in for DiskStore: same interface, one process only
+
+    def __init__(self):
+        self.entries = {}
+        self.locks = {}
+        self.guard = threading.Lock()
+
+    def get(self, version, key):
+        return self.entries.get((version, key))
+
+    def put(self, version, key, data):
+        self.entries[(version, key)] = data
+
+    def prune(self, version):
+        for old in [entry for entry in self.entries if entry[0] != version]:
+            del self.entries[old]
+
+    @contextmanager
+    def lock(self, version, key):
+        with self.guard:
+            lock = self.locks.setdefault((version, key), threading.Lock())
+        with lock:
+            yield
+
+
+class DiskStore:
+    # One file per entry under <directory>/<dataset version>/; writers
+    # hold a per-key thread lock and an exclusive flock on <key>.lock while
+    # running the query
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.locks = {}
+        self.guard = threading.Lock()
+
+    def _path(self, version, key, suffix):
+        return os.path.join(self.directory, version, key + suffix)
+
+    def get(self, version, key):
+        try:
+            with open(self._path(version, key, '.arrow'), 'rb') as entry:
+                return entry.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, version, key, data):
+        os.makedirs(os.path.join(self.directory, version), exist_ok=True)
+        path = self._path(version, key, '.arrow')
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as entry:
+            entry.write(data)
+        # Readers see either no entry or the complete one
+        os.replace(tmp, path)
+
+    def prune(self, version):
+        # Entries of older dataset versions are never read again
+        if not os.path.isdir(self.directory):
+            return
+        for old in os.listdir(self.directory):
+            if old != version:
+                shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+        with self.guard:
+            for old in [entry for entry in self.locks if entry[0] != version]:
+                del self.locks[old]
+
+    @contextmanager
+    def lock(self, version, key):
+        with self.guard:
+            thread_lock = self.locks.setdefault((version, key), threading.Lock())
+        os.makedirs(os.path.join(self.directory, version), exist_ok=True)
+        with thread_lock, open(self._path(version, key, '.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ResultCache:
+    # Cache of view results keyed by (view, arguments, dataset version).
+    # get_or_compute is single-flight: when several workers miss on the same
+    # key at once, one runs the query and the others wait and read its result.
+
+    def __init__(self, store, dataset_version, version_ttl=30):
+        self.store = store
+        self.dataset_version = dataset_version   # callable; returning None bypasses the cache
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_checked = None
+
+    def version(self):
+        # The dataset version costs a query, so it is re-checked at most
+        # every version_ttl seconds per process
+        now = time.monotonic()
+        if self._version_checked is None or now - self._version_checked > self.version_ttl:
+            version = self.dataset_version()
+            if version is not None and version != self._version:
+                self.store.prune(str(version))
+            self._version = version
+            self._version_checked = now
+        return self._version
+
+    def get_or_compute(self, parts, compute):
+        version = self.version()
+        if version is None:
+            return compute()
+        version = str(version)
+        key = hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+        data = self.store.get(version, key)
+        if data is not None:
+            return from_bytes(data)
+        with self.store.lock(version, key):
+            # Another worker may have filled it while we waited for the lock
+            data = self.store.get(version, key)
+            if data is not None:
+                return from_bytes(data)
+            df = compute()
+            self.store.put(version, key, to_bytes(df))
+            return df
@@ -0,0 +1,148 @@
+import os
+import json
+import shutil
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from naming import slug, version_stamp
+
+# Directory the ETL publishes snapshots to and the dashboard reads them from.
+# Layout:
+#   CURRENT                      name of the live version
+#   versions/<version>/*.arrow   one uncompressed Arrow IPC file per table/view
+#   versions/<version>/manifest.json
+SNAPSHOT_DIR = os.environ.get('PHONEPE_SNAPSHOT_DIR')
+
+# View keyword arguments and the result column each one filters on
+FILTER_COLUMNS = {'year': 'years', 'state': 'States'}
+
+
+
+def _write_table(path, df):
+    # Uncompressed IPC files can be memory-mapped and read without copying
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def publish(directory, tables, views, keep=2):
+    # tables: {name: DataFrame}, views: {(function name, query_type): DataFrame}
+    version = version_stamp()
+    path = os.path.join(directory, 'versions', version)
+    os.makedirs(path)
+
+    manifest = {'version': version, 'created': datetime.now().isoformat(), 'tables': {}, 'views': {}}
+    for name, df in tables.items():
+        file_name = f"{name}.arrow"
+        _write_table(os.path.join(path, file_name), df)
+        manifest['tables'][name] = {'file': file_name, 'rows': len(df)}
+    for (function, query_type), df in views.items():
+        file_name = f"view__{function}__{slug(query_type)}.arrow"
+        _write_table(os.path.join(path, file_name), df)
+        manifest['views'].setdefault(function, {})[query_type] = file_name
+    with open(os.path.join(path, 'manifest.json'), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    # Readers only ever follow CURRENT, and os.replace swaps it atomically
+    current_tmp = os.path.join(directory, f"CURRENT.{version}.tmp")
+    with open(current_tmp, 'w') as current:
+        current.write(version)
+    os.replace(current_tmp, os.path.join(directory, 'CURRENT'))
+
+    # A Snapshot maps all of its files when it is opened, and mapped files
+    # stay readable after they are unlinked, so processes still on an older
+    # version are unaffected by deleting it
+    versions = sorted(os.listdir(os.path.join(directory, 'versions')))
+    for old in versions[:-keep]:
+        if old != version:
+            shutil.rmtree(os.path.join(directory, 'versions', old), ignore_errors=True)
+    return version
+
+
+class Snapshot:
+    # One published version. Every file is memory-mapped when the snapshot
+    # is opened, so publish() may delete the version while it is in use;
+    # tables are only read from their mappings when first used. Pages are
+    # shared through the page cache by every process mapping the same files.
+
+    def __init__(self, directory, version):
+        self.version = version
+        self.path = os.path.join(directory, 'versions', version)
+        with open(os.path.join(self.path, 'manifest.json')) as manifest_file:
+            self.manifest = json.load(manifest_file)
+        files = [entry['file'] for entry in self.manifest['tables'].values()]
+        files += [file_name for views in self.manifest['views'].values() for file_name in views.values()]
+        self._sources = {file_name: pa.memory_map(os.path.join(self.path, file_name), 'r')
+                         for file_name in files}
+        self._tables = {}
+
+    def _read(self, file_name):
+        if file_name not in self._tables:
+            self._tables[file_name] = pa.ipc.open_file(self._sources[file_name]).read_all()
+        return self._tables[file_name]
+
+    def table(self, name):
+        return self._read(self.manifest['tables'][name]['file'])
+
+    def years(self, name):
+        return sorted(pc.unique(self.table(name)['years']).to_pylist())
+
+    def _view_table(self, function, query_type, filters):
+        # Stored views hold every year/state; filters narrow them like the
+        # WHERE clause of the SQL version would
+        table = self._read(self.manifest['views'][function][query_type])
+        for name, value in filters.items():
+            if value is not None:
+                table = table.filter(pc.equal(table[FILTER_COLUMNS[name]], value))
+        return table
+
+    def view(self, function, query_type, **filters):
+        # Only the (small) view result is copied into pandas
+        return self._view_table(function, query_type, filters).to_pandas()
+
+    def view_chunks(self, function, query_type, chunk_rows, **filters):
+        # The view as DataFrames of at most chunk_rows rows, converted one
+        # batch at a time; an empty view is one empty frame with its columns
+        table = self._view_table(function, query_type, filters)
+        batches = table.to_batches(max_chunksize=chunk_rows)
+        if not batches:
+            yield table.to_pandas()
+        for batch in batches:
+            yield batch.to_pandas()
+
+
+_snapshots = {}
+
+def _current_version(directory):
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as current:
+            return current.read().strip()
+    except FileNotFoundError:
+        return None
+
+def current_snapshot(directory=SNAPSHOT_DIR):
+    # The Snapshot for the live version, or None if nothing is published.
+    # CURRENT is re-read on every call so a new version is picked up on the
+    # next Streamlit rerun.
+    if not directory:
+        return None
+    version = _current_version(directory)
+    while version is not None:
+        snapshot = _snapshots.get(directory)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        try:
+            snapshot = Snapshot(directory, version)
+        except FileNotFoundError:
+            # Newer versions were published between reading CURRENT and
+            # opening this one, and pruned it: follow CURRENT again
+            latest = _current_version(directory)
+            if latest == version:
+                raise
+            version = latest
+            continue
+        _snapshots[directory] = snapshot
+        return snapshot
+    return None
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pymysql
+import pytest
+
+# The modules live at the repository root and are imported as scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def mydb():
+    # The database etl.py loads; tests that need it are skipped without one
+    from queries import get_connection
+
+    try:
+        connection = get_connection()
+    except pymysql.err.OperationalError as error:
+        pytest.skip(f"MySQL not available: {error}")
+    yield connection
+    connection.close()
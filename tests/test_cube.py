@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+
+
+def _facts(columns, rows):
+    return pd.DataFrame(rows, columns=['state_id', 'years', 'Quarter'] + columns)
+
+
+@pytest.fixture
+def tables():
+    return {
+        'dim_state': pd.DataFrame({'state_id': [1, 2], 'state_name': ['Goa', 'Kerala']}),
+        'dim_district': pd.DataFrame({'district_id': [10, 20], 'state_id': [1, 2],
+                                      'district_name': ['North Goa', 'Idukki']}),
+        'aggregated_transaction': _facts(['Transaction_type', 'Transaction_count', 'Transaction_amount'], [
+            (1, 2023, 1, 'P2P', 5, 50.0), (2, 2023, 1, 'P2P', 7, 70.0)]),
+        'map_transaction': _facts(['district_id', 'Transaction_count', 'Transaction_amount'], [
+            (1, 2023, 1, 10, 5, 50.0), (2, 2023, 1, 20, 7, 70.0)]),
+        'top_transaction_pincode': _facts(['pincode', 'Transaction_count', 'Transaction_amount'], [
+            (1, 2023, 1, 403001, 2, 20.0), (1, 2023, 1, None, 1, 10.0), (1, 2023, 1, 403002, 2, 20.0)]
+        ).astype({'pincode': 'Int32'}),
+        'aggregated_user': _facts(['User_brand', 'User_count'], [(1, 2023, 1, 'Xiaomi', 3)]),
+        'map_user': _facts(['district_id', 'registered_user', 'appOpens'], [
+            (1, 2023, 1, 10, 30, 300), (2, 2023, 1, 20, 40, 400)]),
+        # Read back from MySQL, a NULL pincode is NaN in a float column
+        'top_user_pincode': _facts(['pincode', 'registeredUsers'], [
+            (1, 2023, 1, 403001.0, 10), (1, 2023, 1, np.nan, 5)]),
+        'aggregated_insurance': _facts(['Name', 'count', 'amount'], [(1, 2023, 1, 'Insurance', 1, 100.0)]),
+        'map_insurance': _facts(['district_id', 'Count', 'amount'], [(1, 2023, 1, 10, 1, 100.0)]),
+        'top_insurance_pincode': _facts(['pincode', 'count', 'amount'], [(1, 2023, 1, None, 1, 100.0)]
+                                        ).astype({'pincode': 'Int32'}),
+    }
+
+
+def test_null_pincodes_are_left_out(tables):
+    lookup = cube.Cube(cube.build_cube(tables))
+    pincodes = lookup.slice('transactions', 'pincode', parent=1)
+    assert sorted(pincodes['member']) == [403001, 403002]
+    assert pincodes['amount'].sum() == 40.0
+    assert lookup.slice('users', 'pincode', parent=1)['member'].tolist() == [403001]
+    assert lookup.slice('insurance', 'pincode', parent=1).empty
+
+
+def test_totals_match_the_facts(tables):
+    lookup = cube.Cube(cube.build_cube(tables))
+    country = lookup.slice('transactions', 'country')
+    assert country['amount'].iloc[0] == 120.0
+    states = lookup.slice('users', 'state').set_index('name')
+    assert states.loc['Kerala', 'app_opens'] == 400
@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import download
+from queries import read_sql_chunks, get_connection
+
+
+# What read_sql_chunks yields: dtypes from the column types, so a chunk
+# whose column is all NULL is still typed
+DTYPES = {'state_id': 'Int64', 'district_name': 'string', 'amount': 'float64', 'note': 'string'}
+
+
+def _typed_chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].astype(DTYPES)
+
+
+@pytest.fixture
+def result():
+    rows = 3000
+    rng = np.random.default_rng(0)
+    note = pd.Series([None] * rows, dtype=object)
+    # All NULL in the first chunks, values later on
+    note[2000:] = [f"note {i}" for i in range(1000)]
+    return pd.DataFrame({
+        'state_id': rng.integers(1, 37, rows),
+        'district_name': [f"District {i % 700}" for i in range(rows)],
+        'amount': rng.random(rows) * 1e6,
+        'note': note,
+    })
+
+
+def _read_csv_parts(paths):
+    lines = []
+    for number, path in enumerate(paths):
+        with open(path) as part:
+            text = part.read().splitlines()
+        lines.extend(text if number == 0 else text[1:])
+    return '\n'.join(lines) + '\n'
+
+
+def test_csv_parts_match_a_single_write(result, tmp_path):
+    path = str(tmp_path / 'view.csv')
+    rows, paths = download.write_csv(_typed_chunks(result, 500), path, part_bytes=40000)
+    assert rows == len(result)
+    assert len(paths) > 1
+    assert all(os.path.getsize(part) <= 40000 for part in paths)
+    expected = result.astype(DTYPES).to_csv(index=False)
+    assert _read_csv_parts(paths) == expected
+
+
+def test_parquet_parts_keep_one_schema(result, tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    path = str(tmp_path / 'view.parquet')
+    rows, paths = download.write_parquet(_typed_chunks(result, 500), path, part_bytes=40000)
+    assert rows == len(result)
+    assert len(paths) > 1
+    schemas = [pq.read_schema(part) for part in paths]
+    assert all(schema.equals(schemas[0]) for schema in schemas)
+    note = schemas[0].field('note').type
+    assert pa.types.is_string(note) or pa.types.is_large_string(note)
+    df = pd.concat([pd.read_parquet(part) for part in paths], ignore_index=True)
+    pd.testing.assert_frame_equal(df, result.astype(DTYPES), check_dtype=False)
+
+
+def test_single_part_keeps_the_plain_name(result, tmp_path):
+    path = str(tmp_path / 'view.csv')
+    _, paths = download.write_csv(_typed_chunks(result, 500), path)
+    assert paths == [path]
+
+
+def test_empty_result_keeps_the_columns(result, tmp_path):
+    # What the chunk sources yield for an empty result
+    empty = result.head(0).astype(DTYPES)
+
+    rows, paths = download.write_csv(iter([empty]), str(tmp_path / 'view.csv'))
+    assert rows == 0
+    with open(paths[0]) as exported:
+        assert exported.read() == "state_id,district_name,amount,note\n"
+
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    rows, paths = download.write_parquet(iter([empty]), str(tmp_path / 'view.parquet'))
+    assert rows == 0
+    assert pq.read_schema(paths[0]).names == list(DTYPES)
+    assert pa.types.is_floating(pq.read_schema(paths[0]).field('amount').type)
+    assert pd.read_parquet(paths[0]).empty
+
+
+def test_empty_snapshot_view_exports_its_columns(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    import queries
+    import snapshot
+
+    view = pd.DataFrame({'States': ['Goa'], 'years': [2022], 'total_registered_users': [5]})
+    snapshot.publish(str(tmp_path / 'snapshot'), {}, {('get_user_growth_analysis', 'Trend Analysis Over Time'): view})
+    monkeypatch.setattr(queries, 'SNAPSHOT_DIR', str(tmp_path / 'snapshot'))
+    monkeypatch.setattr(download, 'EXPORT_DIR', str(tmp_path / 'exports'))
+
+    exported = download.export_view('get_user_growth_analysis', 'Trend Analysis Over Time', 'parquet', year=2030)
+    assert exported['rows'] == 0
+    path = tmp_path / 'exports' / exported['parts'][0]['url'].split('/', 3)[-1]
+    assert pq.read_schema(path).names == list(view.columns)
+
+
+def test_read_sql_chunks_matches_read_sql(mydb, tmp_path):
+    # Against MySQL: a scratch table with integer, decimal, float, text and
+    # a column that is NULL for the first chunks
+    mycursor = mydb.cursor()
+    mycursor.execute("DROP TABLE IF EXISTS test_stream_rows")
+    mycursor.execute("""CREATE TABLE test_stream_rows(id INT PRIMARY KEY, state_id TINYINT,
+                        amount DECIMAL(14, 2), ratio DOUBLE, district_name VARCHAR(64), note VARCHAR(64))""")
+    rows = [(i, i % 36 + 1, f"{i * 10.25:.2f}", i / 7, f"District {i % 700}", f"note {i}" if i >= 200 else None)
+            for i in range(250)]
+    mycursor.executemany("INSERT INTO test_stream_rows VALUES (%s, %s, %s, %s, %s, %s)", rows)
+    mydb.commit()
+    try:
+        query = "SELECT * FROM test_stream_rows ORDER BY id"
+        connection = get_connection()
+        try:
+            expected = pd.read_sql(query, connection)
+        finally:
+            connection.close()
+
+        chunks = list(read_sql_chunks(query, chunk_rows=40))
+        assert [len(chunk) for chunk in chunks] == [40] * 6 + [10]
+        assert len({tuple(chunk.dtypes.astype(str)) for chunk in chunks}) == 1
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected, check_dtype=False)
+
+        path = str(tmp_path / 'rows.csv')
+        _, paths = download.write_csv(iter(chunks), path, part_bytes=4000)
+        assert _read_csv_parts(paths) == expected.to_csv(index=False)
+
+        pytest.importorskip('pyarrow')
+        _, paths = download.write_parquet(iter(chunks), str(tmp_path / 'rows.parquet'), part_bytes=4000)
+        df = pd.concat([pd.read_parquet(part) for part in paths], ignore_index=True)
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+        # An empty result is one empty chunk with the result's columns
+        chunks = list(read_sql_chunks(query.replace("ORDER BY", "WHERE id < 0 ORDER BY"), chunk_rows=40))
+        assert [len(chunk) for chunk in chunks] == [0]
+        assert list(chunks[0].columns) == list(expected.columns)
+    finally:
+        mycursor.execute("DROP TABLE test_stream_rows")
+        mydb.commit()
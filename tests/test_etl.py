@@ -0,0 +1,102 @@
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+import etl
+
+
+def _map_user(districts):
+    return {'data': {'hoverData': {name: {'registeredUsers': users, 'appOpens': opens}
+                                   for name, (users, opens) in districts.items()}}}
+
+
+def _write(root, prefix, state, year, quarter, data):
+    folder = root / prefix / state / str(year)
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / f"{quarter}.json").write_text(data if isinstance(data, str) else json.dumps(data))
+
+
+def test_ids_follow_first_use_until_finalized():
+    dims = etl.Dimensions()
+    kerala = dims.state_id('kerala')
+    goa = dims.state_id('goa')
+    assert (kerala, goa) == (1, 2)
+    # map/* and top/* spell districts differently, they still share one id
+    assert dims.district_id(goa, 'north goa district') == dims.district_id(goa, 'North Goa')
+    assert dims.pincode(goa, '') is None
+
+
+def test_finalize_sorts_new_members_and_keeps_foreign_keys():
+    dims = etl.Dimensions()
+    kerala = dims.state_id('kerala')
+    goa = dims.state_id('goa')
+    idukki = dims.district_id(kerala, 'idukki district')
+    south_goa = dims.district_id(goa, 'south goa district')
+    north_goa = dims.district_id(goa, 'north goa district')
+    dims.pincode(goa, '403001')
+    facts = {'map_user': pd.DataFrame({
+        'state_id': np.array([kerala, goa, goa], dtype='int16'),
+        'years': np.array([2023, 2023, 2023], dtype='int16'),
+        'Quarter': np.array([1, 1, 1], dtype='int16'),
+        'district_id': np.array([idukki, south_goa, north_goa], dtype='int16'),
+        'registered_user': [30, 20, 10],
+    })}
+
+    facts = dims.finalize(facts)
+
+    assert dims.states == {'Goa': 1, 'Kerala': 2}
+    assert dims.districts == {(1, 'North Goa'): 1, (1, 'South Goa'): 2, (2, 'Idukki'): 3}
+    assert dims.pincodes == {403001: 1}
+    # Every fact row still names the district it was read for
+    names = {district_id: name for (_, name), district_id in dims.districts.items()}
+    rows = facts['map_user']
+    assert dict(zip(rows['district_id'].map(names), rows['registered_user'])) == {
+        'North Goa': 10, 'South Goa': 20, 'Idukki': 30}
+    assert rows['state_id'].tolist() == [1, 1, 2]
+
+
+def test_finalize_never_moves_ids_loaded_from_the_database():
+    dims = etl.Dimensions()
+    dims.states = {'Kerala': 1}
+    dims.districts = {(1, 'Idukki'): 1}
+    dims.fixed_states = dims.last_state = 1
+    dims.fixed_districts = dims.last_district = 1
+    goa = dims.state_id('goa')
+    assam = dims.state_id('assam')
+    dims.district_id(goa, 'north goa')
+    dims.district_id(1, 'ernakulam')
+    facts = {'map_user': pd.DataFrame({
+        'state_id': np.array([1, goa, assam], dtype='int16'),
+        'years': np.array([2023, 2023, 2023], dtype='int16'),
+        'Quarter': np.array([1, 1, 1], dtype='int16'),
+        'district_id': np.array([1, 1, 1], dtype='int16'),
+    })}
+
+    facts = dims.finalize(facts)
+
+    assert dims.states == {'Kerala': 1, 'Assam': 2, 'Goa': 3}
+    assert dims.districts[(1, 'Idukki')] == 1
+    assert dims.districts[(1, 'Ernakulam')] == 2
+    assert dims.districts[(3, 'North Goa')] == 3
+    assert sorted(facts['map_user']['state_id']) == [1, 2, 3]
+
+
+def test_malformed_files_are_logged_and_allocate_no_ids(tmp_path, caplog):
+    prefix = etl.TABLES['map_user']['path']
+    _write(tmp_path, prefix, 'goa', 2023, 1, _map_user({'north goa district': (10, 100)}))
+    # Schema drift: appOpens renamed
+    _write(tmp_path, prefix, 'kerala', 2023, 1,
+           {'data': {'hoverData': {'idukki district': {'registeredUsers': 5, 'opens': 50}}}})
+    _write(tmp_path, prefix, 'goa', 2023, 2, '{"data": ')
+
+    with caplog.at_level(logging.WARNING, logger=etl.logger.name):
+        dims, facts = etl.extract_tables(['map_user'], str(tmp_path), years=['2023'])
+
+    assert dims.states == {'Goa': 1}
+    assert list(dims.districts) == [(1, 'North Goa')]
+    assert facts['map_user']['registered_user'].tolist() == [10]
+    logged = caplog.text
+    assert f"{prefix}/kerala/2023/1.json" in logged
+    assert f"{prefix}/goa/2023/2.json" in logged
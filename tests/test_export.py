@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+charts = pytest.importorskip('charts')
+import export
+from cube import DOMAIN_MEASURES
+from queries import QUERY_TYPES
+
+STATES = ['Goa', 'Kerala']
+YEARS = [2022, 2023]
+
+
+class Cube:
+    # Two states with every measure, at every level
+    def slice(self, domain, level, parent=0, **filters):
+        return pd.DataFrame({'member': [1, 2], 'name': STATES,
+                             **{measure: [5.0, 7.0] for measure in DOMAIN_MEASURES[domain]}})
+
+
+@pytest.fixture
+def stubbed(monkeypatch):
+    # The query layer answers without a database
+    monkeypatch.setattr(export, 'get_years', lambda table: YEARS)
+    monkeypatch.setattr(export, 'get_states', lambda: STATES)
+    monkeypatch.setattr(export, 'get_cube', Cube)
+    monkeypatch.setattr(export.geo, 'geometry_available', lambda level, state=None: True)
+    return monkeypatch
+
+
+def test_views_cover_the_charts_registry(stubbed):
+    views = export.list_views()
+    names = [export.view_name(query_type, params) for section, _, query_type, params in views]
+    shown = {(function, query_type) for _, function, query_type, _ in views}
+
+    assert {view for view in shown if view[0] != 'drill_down'} == (
+        set(charts.CHARTS) | {('get_map_analysis', query_type) for query_type in QUERY_TYPES['get_map_analysis']})
+    # Every exported file has its own name within its section
+    sections = [section for section, *_ in views]
+    assert len(set(zip(sections, names))) == len(views)
+
+    for (function, query_type), (_, all_years) in charts.YEAR_VIEWS.items():
+        years = [params['year'] for _, f, q, params in views if (f, q) == (function, query_type)]
+        assert years == ([None] if all_years else YEARS)
+
+
+def test_map_and_drill_down_views(stubbed):
+    by_state = export.list_map_views("India Map View", 'get_map_analysis', 'Transactions by State')
+    assert [params for *_, params in by_state] == [{'year': None}, {'year': 2022}, {'year': 2023}]
+    by_district = export.list_map_views("India Map View", 'get_map_analysis', 'Transactions by District')
+    assert [params for *_, params in by_district][3:] == [{'state': state} for state in STATES]
+
+    drill_down = export.list_drill_down_views()
+    measures = sum(len(measures) for measures in DOMAIN_MEASURES.values())
+    assert len(drill_down) == measures + len(DOMAIN_MEASURES) * len(STATES) * 2
+    assert {params['level'] for *_, params in drill_down} == {'state', 'district', 'pincode'}
+
+    stubbed.setattr(export.geo, 'geometry_available', lambda level, state=None: False)
+    assert export.list_map_views("India Map View", 'get_map_analysis', 'Transactions by State') == []
+
+
+def test_export_writes_index_and_timings(stubbed, tmp_path):
+    def top_states(query_type, **params):
+        return pd.DataFrame({'States': STATES, 'years': [2023, 2023], 'highest_registered_users': [10, 20]})
+
+    def broken(query_type, **params):
+        raise RuntimeError("no such table")
+
+    stubbed.setitem(export.QUERY_FUNCTIONS, 'get_user_registration_analysis', top_states)
+    stubbed.setitem(export.QUERY_FUNCTIONS, 'get_transaction_analysis', broken)
+    stubbed.setattr(export, 'list_views', lambda: [
+        ("User Registration Analysis", 'get_user_registration_analysis', 'Identifying Top 10 States', {}),
+        ("Transaction Analysis Across States and Districts", 'get_transaction_analysis',
+         'Identifying Top States', {}),
+        (export.DRILL_DOWN, 'drill_down', "Users by State (app opens)",
+         {'domain': 'users', 'measure': 'app_opens', 'level': 'state'}),
+    ])
+    # The stubs only exist in this process
+    stubbed.setattr(export, 'ProcessPoolExecutor', ThreadPoolExecutor)
+
+    timings = export.export(str(tmp_path), workers=2)
+
+    assert (tmp_path / export.PLOTLY_JS).exists()
+    assert timings['error'].notna().tolist() == [False, True, False]
+    assert timings['rows'].iloc[[0, 2]].tolist() == [2, 2]
+    assert timings['error'].iloc[1] == "RuntimeError: no such table"
+    assert pd.read_csv(tmp_path / 'timings.csv')['query_type'].tolist() == timings['query_type'].tolist()
+
+    index = (tmp_path / 'index.html').read_text()
+    assert "User_Registration_Analysis/Identifying_Top_10_States_1.html" in index
+    assert "Drill_Down_Explorer/Users_by_State_app_opens_1.html" in index
+    assert "<b>Failed:</b> RuntimeError: no such table" in index
+    assert (tmp_path / 'Drill_Down_Explorer' / 'Users_by_State_app_opens_1.html').exists()
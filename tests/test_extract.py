@@ -0,0 +1,89 @@
+import json
+import shutil
+import tarfile
+import zipfile
+
+import pytest
+
+import etl
+
+
+def _file(prefix, state, year, quarter):
+    # A small, deterministic Pulse file of the layout of prefix
+    n = (len(state) + year + quarter) % 7 + 1
+    districts = [f"{state} district {i}" for i in range(2)]
+    pincodes = [str(400000 + len(state) * 100 + i) for i in range(2)] + ['']
+    if prefix.startswith('aggregated/user'):
+        return {'data': {'usersByDevice': [{'brand': brand, 'count': n * 10, 'percentage': 0.5}
+                                           for brand in ['Xiaomi', 'Apple']]}}
+    if prefix.startswith('aggregated'):
+        return {'data': {'transactionData': [{'name': name, 'paymentInstruments': [{'count': n, 'amount': n * 1.5}]}
+                                             for name in ['P2P', 'Merchant']]}}
+    if prefix.startswith('map/user'):
+        return {'data': {'hoverData': {name: {'registeredUsers': n, 'appOpens': n * 3} for name in districts}}}
+    if prefix.startswith('map'):
+        return {'data': {'hoverDataList': [{'name': name, 'metric': [{'count': n, 'amount': n * 2.5}]}
+                                           for name in districts]}}
+    if prefix.startswith('top/user'):
+        return {'data': {'districts': [{'name': name, 'registeredUsers': n} for name in districts],
+                         'pincodes': [{'name': pincode, 'registeredUsers': n} for pincode in pincodes]}}
+    return {'data': {'districts': [{'entityName': name, 'metric': {'count': n, 'amount': n * 4.0}}
+                                   for name in districts],
+                     'pincodes': [{'entityName': pincode, 'metric': {'count': n, 'amount': n * 4.0}}
+                                  for pincode in pincodes]}}
+
+
+@pytest.fixture(scope='module')
+def pulse(tmp_path_factory):
+    # pulse/data with every table's folder, packed the way GitHub serves it
+    root = tmp_path_factory.mktemp('pulse')
+    data = root / 'pulse-master' / 'data'
+    for prefix in sorted({spec['path'] for spec in etl.TABLES.values()}):
+        for state in ['goa', 'kerala', 'andaman-&-nicobar-islands']:
+            for year in [2022, 2023]:
+                for quarter in range(1, 5):
+                    folder = data / prefix / state / str(year)
+                    folder.mkdir(parents=True, exist_ok=True)
+                    (folder / f"{quarter}.json").write_text(json.dumps(_file(prefix, state, year, quarter)))
+
+    with zipfile.ZipFile(root / 'pulse-master.zip', 'w', zipfile.ZIP_DEFLATED) as archive:
+        for path in sorted((root / 'pulse-master').rglob('*.json')):
+            archive.write(path, path.relative_to(root).as_posix())
+    with tarfile.open(root / 'pulse-master.tar.gz', 'w:gz') as archive:
+        archive.add(root / 'pulse-master', 'pulse-master')
+    return root
+
+
+def _extract(source, workers):
+    dims, facts = etl.extract_all(str(source), years=['2022', '2023'], workers=workers)
+    return dims.frames(), facts
+
+
+def _assert_same(expected, actual):
+    for expected_tables, actual_tables in zip(expected, actual):
+        assert list(expected_tables) == list(actual_tables)
+        for name, df in expected_tables.items():
+            assert df.equals(actual_tables[name]), name
+
+
+@pytest.mark.parametrize('archive', ['pulse-master.zip', 'pulse-master.tar.gz'])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_archives_give_the_directory_facts(pulse, archive, workers):
+    expected = _extract(pulse / 'pulse-master' / 'data', workers=1)
+    assert all(len(df) for df in expected[1].values())
+    _assert_same(expected, _extract(pulse / archive, workers))
+
+
+def test_directory_walk_with_workers(pulse):
+    data = pulse / 'pulse-master' / 'data'
+    _assert_same(_extract(data, workers=1), _extract(data, workers=4))
+
+
+def test_missing_folder_is_skipped(pulse, tmp_path):
+    data = tmp_path / 'data'
+    shutil.copytree(pulse / 'pulse-master' / 'data', data)
+    shutil.rmtree(data / etl.TABLES['aggregated_insurance']['path'])
+
+    _, facts = _extract(data, workers=1)
+    assert facts['aggregated_insurance'].empty
+    assert len(facts['aggregated_transaction']) == 3 * 2 * 4 * 2
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+
+
+def _quarters(years):
+    return [(year, quarter) for year in years for quarter in range(1, 5)]
+
+
+@pytest.fixture
+def tables():
+    # Two districts named Aurangabad, in Bihar and Maharashtra, on very
+    # different scales
+    rows = []
+    for number, (year, quarter) in enumerate(_quarters(range(2020, 2024))):
+        rows.append((1, 101, year, quarter, 100.0 + number, 10 + number))
+        rows.append((2, 201, year, quarter, 1000.0 + 10 * number, 100 + number))
+    map_transaction = pd.DataFrame(rows, columns=['state_id', 'district_id', 'years', 'Quarter',
+                                                  'Transaction_amount', 'Transaction_count'])
+    map_user = map_transaction.rename(columns={'Transaction_amount': 'registered_user',
+                                               'Transaction_count': 'appOpens'})
+    return {'map_transaction': map_transaction, 'map_user': map_user}
+
+
+def test_fit_recovers_trend_and_season():
+    periods = np.arange(2018 * 4, 2024 * 4)
+    t = np.arange(len(periods))
+    values = np.expm1(5 + 0.05 * t + 0.2 * (periods % 4 == 3))[None, :]
+    predicted, lower, upper = forecast.fit(values, periods)
+    future = np.arange(len(periods), len(periods) + forecast.HORIZON)
+    expected = np.expm1(5 + 0.05 * future + 0.2 * ((periods[-1] + 1 + np.arange(forecast.HORIZON)) % 4 == 3))
+    np.testing.assert_allclose(predicted[0], expected, rtol=1e-3)
+    assert (lower <= predicted).all() and (predicted <= upper).all()
+
+
+def test_short_series_get_no_forecast():
+    periods = np.arange(2023 * 4, 2024 * 4)
+    predicted, _, _ = forecast.fit(np.ones((1, len(periods))), periods)
+    assert np.isnan(predicted).all()
+
+
+def test_districts_are_fitted_by_id(tables):
+    forecasts = forecast.build_forecasts(tables)
+    districts = forecasts[(forecasts['level'] == 'district') & (forecasts['measure'] == 'Transaction_amount')]
+    by_district = districts.groupby(['state_id', 'district_id'])['forecast'].first()
+    assert list(by_district.index) == [(1, 101), (2, 201)]
+    assert by_district[(1, 101)] < 200 < 1000 < by_district[(2, 201)]
+
+
+def test_same_named_districts_stay_separate_series(tables):
+    charts = pytest.importorskip('charts')
+    actual = tables['map_transaction'].assign(
+        States=lambda df: df['state_id'].map({1: 'Bihar', 2: 'Maharashtra'}),
+        district_name='Aurangabad', value=lambda df: df['Transaction_amount'],
+        lower=np.nan, upper=np.nan, kind='actual')
+    fig, = charts.forecast_view(actual, 'Transaction Amount by District')
+    solid = {trace.name: list(trace.y) for trace in fig.data if trace.line.dash == 'solid'}
+    assert set(solid) == {'Aurangabad (Bihar), actual', 'Aurangabad (Maharashtra), actual'}
+    assert solid['Aurangabad (Bihar), actual'] == sorted(solid['Aurangabad (Bihar), actual'])
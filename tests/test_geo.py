@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+
+import geo
+
+
+def test_name_key_joins_pulse_and_boundary_spellings():
+    assert geo.name_key("Andaman & Nicobar Islands") == geo.name_key("Andaman and Nicobar")
+    assert geo.name_key("andaman-&-nicobar-islands".replace('-', ' ')) == "andamanandnicobar"
+    assert geo.name_key("North Goa District") == geo.name_key("north goa")
+    assert geo.name_key("Dadra & Nagar Haveli & Daman & Diu") == geo.name_key("Dadra and Nagar Haveli and Daman and Diu")
+    assert geo.district_feature_id("Goa", "North Goa District") == "goa/northgoa"
+
+
+def test_simplify_ring_drops_points_within_tolerance():
+    # A square with a slight bump on one edge and a point on another
+    ring = np.array([[0, 0], [1, 0.001], [2, 0], [2, 1], [2, 2], [0, 2], [0, 0]], dtype='float64')
+    simplified = geo.simplify_ring(ring, tolerance=0.01)
+    assert simplified.tolist() == [[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]]
+    # Points further out than the tolerance are kept
+    assert len(geo.simplify_ring(ring, tolerance=0.0001)) == 6
+
+
+def test_simplify_ring_keeps_tiny_rings_and_collapses_degenerate_ones():
+    triangle = np.array([[0, 0], [1, 0], [0, 1], [0, 0]], dtype='float64')
+    assert geo.simplify_ring(triangle, tolerance=10) is triangle
+    sliver = np.array([[0, 0], [1, 0.001], [2, 0], [1, -0.001], [0, 0]], dtype='float64')
+    assert geo.simplify_ring(sliver, tolerance=0.01) is None
+
+
+def test_simplify_polygon_drops_collapsed_holes_and_keeps_outlines():
+    outline = [[0, 0], [1, 0.0001], [2, 0], [1, -0.0001], [0, 0]]
+    hole = [[0.5, 0.5], [0.6, 0.5001], [0.7, 0.5], [0.6, 0.4999], [0.5, 0.5]]
+    rings = geo._simplify_polygon([outline, hole], tolerance=0.01)
+    # The collapsed outline becomes a coarse closed ring, the hole is gone
+    assert len(rings) == 1
+    assert len(rings[0]) == 4 and rings[0][0] == rings[0][-1]
+
+    square = [[0, 0], [2.00049, 0], [2, 2], [0, 2], [0, 0]]
+    rings = geo._simplify_polygon([square], tolerance=0.01)
+    # Coordinates are rounded to COORDINATE_DECIMALS
+    assert rings == [[[0, 0], [2.0, 0], [2, 2], [0, 2], [0, 0]]]
+
+
+def test_build_without_districts_writes_state_maps(tmp_path):
+    states = tmp_path / 'states.geojson'
+    states.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'ST_NM': 'Andaman & Nicobar Island'},
+         'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}}]}))
+
+    geo.build(str(states), output=str(tmp_path / 'geo'))
+
+    built = json.loads((tmp_path / 'geo' / 'states_country.geojson').read_text())
+    assert [feature['id'] for feature in built['features']] == [geo.name_key('Andaman and Nicobar')]
+    assert not (tmp_path / 'geo' / 'districts_country.geojson').exists()
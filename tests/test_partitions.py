@@ -0,0 +1,15 @@
+import pytest
+
+import etl
+from queries import get_years
+
+charts = pytest.importorskip('charts')
+
+
+def test_year_views_read_only_their_year(mydb):
+    for (function, query_type), (table, _) in charts.YEAR_VIEWS.items():
+        for year in get_years(table):
+            plan = etl.explain_year_views(mydb, year, [(function, query_type)])[(function, query_type)]
+            assert plan, f"{query_type} reads no fact table"
+            for fact_table, partitions in plan:
+                assert partitions == etl.partition_name(year), (query_type, fact_table, partitions)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+import preview
+
+
+def test_small_results_are_stored_whole():
+    df = pd.DataFrame({'States': ['Goa', 'Kerala'], 'total_user': [1.0, 2.0]})
+    assert preview.summarise(df, None, rows=10) is df
+
+
+def test_results_are_summed_to_the_chart_grain():
+    rng = np.random.default_rng(0)
+    rows = 5000
+    df = pd.DataFrame({'States': rng.choice(['Goa', 'Kerala', 'Punjab'], rows),
+                       'district_name': rng.choice(['North', 'South', None], rows),
+                       'pincode': rng.integers(100000, 999999, rows),
+                       'total_registered_users': rng.random(rows) * 1000})
+    _, grain = preview.PREVIEW_VIEWS[('get_user_registration_analysis', 'Comparative Analysis')]
+    summary = preview.summarise(df, grain)
+    assert len(summary) <= 9
+    # Same totals per bar segment as the full result, including unknown districts
+    keys = ['States', 'district_name']
+    expected = df.groupby(keys, dropna=False)['total_registered_users'].sum()
+    pd.testing.assert_series_equal(summary.set_index(keys)['total_registered_users'].sort_index(),
+                                   expected.sort_index())
+
+
+def _trend(years=(2022, 2023)):
+    # Trend Analysis Over Time: one row per district and quarter
+    rng = np.random.default_rng(1)
+    rows = [(state, f"{state} {district}", year, quarter)
+            for state, districts in [('Goa', 2), ('Kerala', 14), ('Punjab', 23)]
+            for district in range(districts) for year in years for quarter in range(1, 5)]
+    df = pd.DataFrame(rows, columns=['States', 'district_name', 'years', 'Quarter'])
+    df['total_user'] = rng.integers(1000, 10**6, len(df))
+    df['total_appopens'] = rng.integers(0, 10**7, len(df))
+    return df
+
+
+def test_trend_preview_keeps_the_bars_and_the_mean_line():
+    df = _trend()
+    _, grain = preview.PREVIEW_VIEWS[('get_user_growth_analysis', 'Trend Analysis Over Time')]
+    drawn = preview.spread(preview.summarise(df, grain), grain)
+    # Stacked bars: app opens per quarter and state
+    bars = ['Quarter', 'States']
+    pd.testing.assert_series_equal(drawn.groupby(bars)['total_appopens'].sum(),
+                                   df.groupby(bars)['total_appopens'].sum().astype('float64'))
+    # Seaborn lines: mean per quarter over all rows
+    for column in ['total_user', 'total_appopens']:
+        pd.testing.assert_series_equal(drawn.groupby('Quarter')[column].mean(),
+                                       df.groupby('Quarter')[column].mean())
+
+
+def test_stored_previews_are_smaller_than_the_exact_results(monkeypatch):
+    class View:
+        def __init__(self, result):
+            self.result = result
+
+        def run_sql(self, query_type, year=None):
+            return self.result if year is None else self.result[self.result['years'] == year]
+
+    trend = _trend()
+    registrations = pd.DataFrame({'States': ['Goa', 'Goa', 'Kerala'] * 100,
+                                  'district_name': ['North', 'South', 'Idukki'] * 100,
+                                  'total_registered_users': range(300)})
+    results = {'get_user_growth_analysis': View(trend), 'get_user_registration_analysis': View(registrations)}
+    monkeypatch.setattr(preview, 'QUERY_FUNCTIONS', results)
+    monkeypatch.setattr(preview, 'PREVIEW_VIEWS', {
+        view: spec for view, spec in preview.PREVIEW_VIEWS.items() if spec[1] is not None})
+    monkeypatch.setattr(preview, 'get_years', lambda table: [2022, 2023])
+
+    stored = preview.build_previews()
+
+    assert stored['years'].tolist() == [0, 0, 2022, 2023]
+    assert (stored['preview_rows'] < stored['total_rows']).all()
+    exact = [results[view].run_sql(query_type, year=year or None).to_json(orient='split', index=False)
+             for view, query_type, year in zip(stored['view_name'], stored['query_type'], stored['years'])]
+    assert (stored['data'].str.len() < pd.Series([len(data) for data in exact])).all()
+
+
+def test_too_large_without_grain_has_no_preview():
+    df = pd.DataFrame({'States': ['Goa'] * 20, 'total_user': range(20)})
+    assert preview.summarise(df, None, rows=10) is None
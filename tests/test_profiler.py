@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import profiler
+
+
+def _busy_query(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return 'rows'
+
+
+def _frames(stacks):
+    return {frame.split(' ')[0] for stack in stacks for frame in stack}
+
+
+def test_followed_pool_thread_is_sampled():
+    session_state = {'profile_runs': 1}
+    profiler.begin({}, session_state)
+    with ThreadPoolExecutor(1) as pool:
+        result = pool.submit(profiler.follow(session_state, _busy_query), 0.3).result()
+    capture = session_state['profile_capture']
+    capture['profiler'].stop()
+    assert result == 'rows'
+    assert '_busy_query' in _frames(capture['profiler'].stacks)
+    # The pool thread is no longer sampled once the query is done
+    assert len(capture['profiler'].thread_ids) == 1
+
+
+def test_unfollowed_pool_thread_is_not_sampled():
+    session_state = {'profile_runs': 1}
+    profiler.begin({}, session_state)
+    with ThreadPoolExecutor(1) as pool:
+        pool.submit(_busy_query, 0.3).result()
+    capture = session_state['profile_capture']
+    capture['profiler'].stop()
+    assert '_busy_query' not in _frames(capture['profiler'].stacks)
+
+
+def test_follow_is_a_no_op_without_a_capture():
+    assert profiler.follow({}, _busy_query) is _busy_query
+
+
+def _begin(monkeypatch, query_params):
+    monkeypatch.setattr(profiler, 'PROFILE_TOKEN', 'secret')
+    session_state = {}
+    profiler.begin(query_params, session_state)
+    capture = session_state.get('profile_capture')
+    if capture is not None:
+        capture['profiler'].stop()
+    return session_state
+
+
+def test_runs_parameter_is_parsed_defensively(monkeypatch):
+    query_params = {'profile': 'secret', 'runs': 'abc'}
+    session_state = _begin(monkeypatch, query_params)
+    # This rerun is the one armed run
+    assert session_state['profile_capture'] is not None
+    assert session_state['profile_runs'] == 0
+    assert query_params == {}
+
+    assert _begin(monkeypatch, {'profile': 'secret', 'runs': '100000'})['profile_runs'] == profiler.MAX_RUNS - 1
+    assert _begin(monkeypatch, {'profile': 'secret', 'runs': '-3'})['profile_runs'] == 0
+
+
+def test_wrong_or_missing_token_arms_nothing(monkeypatch):
+    for query_params in [{'profile': 'secreT'}, {'profile': ''}, {'runs': '3'}]:
+        assert _begin(monkeypatch, dict(query_params)) == {}
+    monkeypatch.setattr(profiler, 'PROFILE_TOKEN', None)
+    session_state = {}
+    profiler.begin({'profile': 'secret'}, session_state)
+    assert session_state == {}
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+
+import queries
+
+
+class Connection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('call', [lambda: queries.get_years('map_user'), queries.get_states, queries.get_cube])
+def test_failed_queries_close_their_connection(monkeypatch, call):
+    connection = Connection()
+    monkeypatch.setattr(queries, 'get_connection', lambda: connection)
+    monkeypatch.setattr(queries, 'get_dataset_version', lambda: 'failing')
+
+    def fail(query, conn, params=None):
+        raise pd.errors.DatabaseError("query failed")
+    monkeypatch.setattr(pd, 'read_sql', fail)
+
+    with pytest.raises(pd.errors.DatabaseError):
+        call()
+    assert connection.closed
@@ -0,0 +1,58 @@
+import time
+import threading
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+from result_cache import ResultCache, LocalStore, DiskStore
+
+
+@pytest.fixture(params=['local', 'disk'])
+def store(request, tmp_path):
+    return LocalStore() if request.param == 'local' else DiskStore(str(tmp_path))
+
+
+def test_concurrent_misses_compute_once(store):
+    cache = ResultCache(store, lambda: 'v1')
+    calls = []
+    expected = pd.DataFrame({'States': ['Goa', 'Kerala'], 'total': [1.5, 2.5]})
+
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return expected
+
+    workers = 8
+    start = threading.Barrier(workers)
+    results = [None] * workers
+
+    def worker(number):
+        start.wait()
+        results[number] = cache.get_or_compute(['view', 'Comparative Analysis', []], compute)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    for result in results:
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_new_dataset_version_recomputes(store):
+    version = ['v1']
+    cache = ResultCache(store, lambda: version[0], version_ttl=0)
+    calls = []
+
+    def compute():
+        calls.append(version[0])
+        return pd.DataFrame({'total': [len(calls)]})
+
+    cache.get_or_compute(['view'], compute)
+    cache.get_or_compute(['view'], compute)
+    version[0] = 'v2'
+    assert cache.get_or_compute(['view'], compute)['total'].tolist() == [2]
+    assert calls == ['v1', 'v2']
@@ -0,0 +1,95 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+import snapshot
+
+
+def _tables(amount):
+    return {
+        'dim_state': pd.DataFrame({'state_id': [1, 2], 'state_name': ['Goa', 'Kerala']}),
+        'map_user': pd.DataFrame({'state_id': [1, 2, 1], 'years': [2022, 2023, 2023],
+                                  'Quarter': [1, 1, 2], 'registered_user': [amount, 20, 30]}),
+    }
+
+
+def _views(amount):
+    return {('get_user_growth_analysis', 'Trend Analysis Over Time'): pd.DataFrame({
+        'States': ['Goa', 'Kerala', 'Goa', 'Kerala'],
+        'years': [2022, 2022, 2023, 2023],
+        'total_registered_users': [amount, 2, 3, 4],
+    })}
+
+
+def _publish(directory, amount, keep=2):
+    return snapshot.publish(str(directory), _tables(amount), _views(amount), keep=keep)
+
+
+def test_publish_swaps_current(tmp_path):
+    first = _publish(tmp_path, 10)
+    assert snapshot.current_snapshot(str(tmp_path)).version == first
+    assert (tmp_path / 'CURRENT').read_text() == first
+    assert snapshot.current_snapshot(str(tmp_path)).table('map_user').num_rows == 3
+
+    second = _publish(tmp_path, 11)
+    assert (tmp_path / 'CURRENT').read_text() == second
+    current = snapshot.current_snapshot(str(tmp_path))
+    assert current.version == second
+    assert current.table('map_user')['registered_user'][0].as_py() == 11
+    assert current.years('map_user') == [2022, 2023]
+    # No temporary pointer is left behind
+    assert sorted(os.listdir(tmp_path)) == ['CURRENT', 'versions']
+
+
+def test_publish_keeps_the_newest_versions(tmp_path):
+    versions = [_publish(tmp_path, amount, keep=2) for amount in range(4)]
+    assert sorted(os.listdir(tmp_path / 'versions')) == versions[-2:]
+
+
+def test_view_filters(tmp_path):
+    _publish(tmp_path, 1)
+    current = snapshot.current_snapshot(str(tmp_path))
+    view = ('get_user_growth_analysis', 'Trend Analysis Over Time')
+
+    assert len(current.view(*view)) == 4
+    assert current.view(*view, year=2023)['total_registered_users'].tolist() == [3, 4]
+    assert current.view(*view, state='Goa')['total_registered_users'].tolist() == [1, 3]
+    assert current.view(*view, year=2022, state='Kerala')['total_registered_users'].tolist() == [2]
+    # None means "all", like leaving the WHERE clause out
+    assert len(current.view(*view, year=None)) == 4
+
+    chunks = list(current.view_chunks(*view, 3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert pd.concat(chunks, ignore_index=True).equals(current.view(*view))
+    chunks = list(current.view_chunks(*view, 1, state='Kerala'))
+    assert [chunk['years'].tolist() for chunk in chunks] == [[2022], [2023]]
+
+
+def test_reader_survives_pruning(tmp_path):
+    # A dashboard process opens a version, the ETL then publishes twice and
+    # deletes it; tables the process had not read yet must still load
+    _publish(tmp_path, 7)
+    opened = snapshot.Snapshot(str(tmp_path), (tmp_path / 'CURRENT').read_text())
+    _publish(tmp_path, 8)
+    _publish(tmp_path, 9)
+    assert not os.path.exists(opened.path)
+
+    assert opened.table('map_user')['registered_user'][0].as_py() == 7
+    assert opened.view('get_user_growth_analysis', 'Trend Analysis Over Time', year=2022)[
+        'total_registered_users'].tolist() == [7, 2]
+
+
+def test_current_follows_pointer_past_a_pruned_version(tmp_path, monkeypatch):
+    # CURRENT is read, then two newer versions are published and the one
+    # read is pruned before it is opened
+    _publish(tmp_path, 1)
+    stale = (tmp_path / 'CURRENT').read_text()
+    _publish(tmp_path, 2)
+    latest = _publish(tmp_path, 3)
+    versions = iter([stale])
+    real = snapshot._current_version
+    monkeypatch.setattr(snapshot, '_current_version', lambda directory: next(versions, None) or real(directory))
+
+    assert snapshot.current_snapshot(str(tmp_path)).version == latest